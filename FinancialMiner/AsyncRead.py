@@ -0,0 +1,454 @@
+# Standard library imports
+import asyncio
+import os
+import re
+import shlex
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Local imports
+from . import get_logger, lazy_import
+from .OcrCache import page_cache_key, page_content_hash
+from .OcrEngines import TesseractEngine, pnm_header, OCR_CONFIG
+from .Preprocess import BlankPageRules
+from .Read import (
+    OcrBudget,
+    OcrSettings,
+    PAGE_COLUMNS,
+    OCR_DPI,
+    capped_dpi,
+    new_result,
+    ocr_output_suspect,
+    orientation_suspect,
+    page_deadline,
+    page_record,
+    pix_to_image,
+    prepare_image,
+    render_page,
+    retry_resolution,
+    skip_ocr,
+    text_layer_lines,
+    time_left,
+)
+
+# Third-party imports, loaded on first use
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+fitz = lazy_import("fitz")
+pytesseract = lazy_import("pytesseract")
+
+logger = get_logger()
+
+# Number of tesseract processes run at once by default, across every document
+# read in the event loop
+DEFAULT_OCR_CONCURRENCY = os.cpu_count() or 1
+
+# Concurrency of the OCR limits, set by the first ocr_limit call
+_ocr_concurrency = None
+
+# OCR limit of each event loop, created on first use (see ocr_limit)
+_ocr_limits = {}
+
+# PyMuPDF is not thread-safe, so pages are rendered one at a time on this
+# thread, off the event loop
+_render_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="FinancialMiner-render")
+
+
+def ocr_limit(concurrency=None):
+    """
+    Get the limit on concurrent tesseract processes of the running event loop.
+
+    Every aread call without its own limit shares this semaphore, so an async
+    service reading many documents at once never runs more than this many
+    tesseract processes. An asyncio.Semaphore belongs to a single event loop, so
+    each loop (each asyncio.run) gets its own limit. The first call sets the
+    concurrency, so a service should call this once at startup to choose it.
+
+    Args:
+        concurrency (int): Number of concurrent tesseract processes, used when the
+            first limit is created. Defaults to DEFAULT_OCR_CONCURRENCY.
+
+    Returns:
+        asyncio.Semaphore: The OCR limit shared in the running event loop.
+
+    Raises:
+        RuntimeError: If called outside a running event loop.
+    """
+    global _ocr_concurrency
+    if _ocr_concurrency is None:
+        _ocr_concurrency = concurrency or DEFAULT_OCR_CONCURRENCY
+
+    loop = asyncio.get_running_loop()
+    limit = _ocr_limits.get(loop)
+    if limit is None:
+        # Drop the limits of closed loops
+        for closed in [closed for closed in _ocr_limits if closed.is_closed()]:
+            del _ocr_limits[closed]
+        limit = _ocr_limits[loop] = asyncio.Semaphore(_ocr_concurrency)
+    return limit
+
+async def aread(
+    filename,
+    limit=None,
+    text_layer=True,
+    cache=None,
+    dpi=OCR_DPI,
+    pages=None,
+    orientation=True,
+    skip_blank=True,
+    blank_rules=None,
+    preprocess=None,
+    config=OCR_CONFIG,
+    budget=OcrBudget(),
+):
+    """
+    Read PDF file and extract text and metadata, driving tesseract from asyncio.
+
+    Works like read() with a TesseractEngine, but instead of worker processes
+    each OCRed page gets its own tesseract subprocess started with
+    asyncio.create_subprocess_exec, the page image being piped to its stdin.
+    Pages are OCRed concurrently up to the limit and put back in page order.
+
+    Pages are rendered one at a time on a dedicated thread, as PyMuPDF is not
+    thread-safe, and the blank page check and preprocessing run in the default
+    executor, so the event loop stays free while pages are prepared. PyMuPDF
+    holds the GIL while it renders, so each render (tens of milliseconds at the
+    default resolution) still pauses the event loop briefly. Only pages
+    holding a slot of the limit are rendered, so at most as many page images as
+    the limit allows are in memory. The text layer and cache lookups still run on
+    the event loop, before OCR starts.
+
+    Args:
+        filename (str): Path to the PDF file.
+        limit (asyncio.Semaphore): Limit on concurrent tesseract processes.
+            Defaults to the process-wide limit from ocr_limit.
+        text_layer (bool): Use the embedded PDF text layer for pages that have usable
+            text, and only OCR scanned or image-only pages.
+        cache (OcrCache): Optional on-disk OCR cache, shared with read().
+        dpi (int): Render resolution for OCRed pages.
+        pages (list): Zero-based page numbers to read. Defaults to every page.
+        orientation (bool): Detect and correct rotated pages.
+        skip_blank (bool): Skip OCR on blank and image-only pages.
+        blank_rules (BlankPageRules): Thresholds for the blank page check.
+        preprocess (PreprocessRules): Image preprocessing run before OCR.
+        config (str): Tesseract configuration flags.
+        budget (OcrBudget): Per-page and per-document OCR time budgets and a pixel
+            ceiling, as in read(). A tesseract process running over the page
+            budget is killed and the page retried once at a lower resolution.
+            Oversized pages are rendered whole rather than in strips. None
+            disables the limits.
+
+    Returns:
+        pandas.DataFrame: DataFrame containing extracted data from PDF.
+        dict: Dictionary containing extracted text per page.
+    """
+    if limit is None:
+        limit = ocr_limit()
+    if blank_rules is None:
+        blank_rules = BlankPageRules()
+    settings = OcrSettings(
+        dpi=dpi,
+        orientation=orientation,
+        engine=TesseractEngine(config),
+        blank_rules=blank_rules if skip_blank else None,
+        preprocess=preprocess,
+        budget=budget,
+    )
+    cache_counts = {"hits": 0, "misses": 0}
+    deadline = None
+    if budget is not None and budget.document_timeout is not None:
+        deadline = time.time() + budget.document_timeout
+
+    with fitz.open(filename) as doc:
+        page_numbers = list(range(doc.page_count)) if pages is None else sorted(pages)
+        entries = []
+
+        for number_page in page_numbers:
+            page = doc[number_page]
+            entry = {
+                "page": number_page,
+                "source": "ocr",
+                "cache_key": None,
+                "content_hash": None,
+                "rotation": None,
+                "job": None,
+            }
+
+            # Use the embedded text layer when it is usable
+            lines_page = text_layer_lines(page) if text_layer else None
+            if lines_page is not None:
+                entry["source"] = "text"
+
+            # Otherwise look for the page OCR output in the cache
+            elif cache is not None:
+                entry["content_hash"] = page_content_hash(page)
+                entry["cache_key"] = page_cache_key(
+                    entry["content_hash"], dpi, settings.cache_config(), settings.engine.version()
+                )
+                lines_page = cache.get(entry["cache_key"])
+                if lines_page is not None:
+                    entry["source"] = "cache"
+                    cache_counts["hits"] += 1
+                else:
+                    cache_counts["misses"] += 1
+                    if orientation:
+                        entry["rotation"] = cache.get_rotation(entry["content_hash"])
+
+            # Otherwise OCR the page concurrently with the others
+            entry["lines"] = lines_page
+            if lines_page is None:
+                entry["job"] = asyncio.ensure_future(
+                    aocr_page(page, settings, limit, deadline, entry["rotation"])
+                )
+            entries.append(entry)
+
+        # Wait for every page before the document is closed, cancelling the
+        # remaining pages (and killing their tesseract processes) on error
+        jobs = [entry["job"] for entry in entries if entry["job"] is not None]
+        try:
+            await asyncio.gather(*jobs)
+        except BaseException:
+            for job in jobs:
+                job.cancel()
+            await asyncio.gather(*jobs, return_exceptions=True)
+            # A cancelled render keeps running on the render thread; let it
+            # finish before the document is closed
+            await asyncio.get_running_loop().run_in_executor(_render_executor, lambda: None)
+            raise
+
+    # Reassemble the pages in order
+    records = []
+    text_dict = {filename: {}}
+    for entry in entries:
+        result = {}
+        if entry["job"] is not None:
+            result = entry["job"].result()
+            entry["lines"], entry["source"] = result["lines"], result["source"]
+
+            # Only full OCR output is cached, as in iter_pages
+            if cache is not None and result["source"] == "ocr" and not result["timeouts"]:
+                cache.put(entry["cache_key"], entry["lines"])
+                if result["rotation"] is not None and entry["rotation"] is None:
+                    cache.put_rotation(entry["content_hash"], result["rotation"])
+
+        record = page_record(
+            filename,
+            entry["page"],
+            entry["lines"],
+            entry["source"],
+            result.get("dpi"),
+            result.get("retries", 0),
+            result.get("timeouts", 0),
+        )
+        text_dict[filename][record["PAGE_NUMBER"]] = record.pop("LINES")
+        records.append(record)
+
+    if cache is not None:
+        logger.info(
+            f"OCR cache for {filename}: {cache_counts['hits']} hits, {cache_counts['misses']} misses"
+        )
+
+    # Convert page records to DataFrame
+    df = pd.DataFrame(records, columns=PAGE_COLUMNS)
+
+    return df, text_dict
+
+async def aocr_page(page, settings, limit, deadline=None, rotation=None):
+    """
+    Render and OCR a page within its time budget while holding a slot of the
+    OCR limit.
+
+    A page that runs out of time is retried once at the budget retry resolution,
+    and gets source "timeout" if that runs out of time too. Nothing is rendered
+    once the document budget has run out.
+
+    Args:
+        page (fitz.Page): Page to OCR.
+        settings (OcrSettings): OCR settings, with a TesseractEngine.
+        limit (asyncio.Semaphore): Limit on concurrent tesseract processes.
+        deadline (float): time.time() by which the document budget runs out.
+        rotation (int): Known clockwise rotation of the page, if any.
+
+    Returns:
+        dict: Page result, as returned by ocr_page.
+    """
+    result = new_result(rotation, capped_dpi(page, settings.dpi, settings.budget))
+    async with limit:
+        # Pages left when the document budget has run out are not rendered
+        if skip_ocr(result, settings, deadline):
+            return result
+
+        # Keep the pixmap alive while its image is used
+        pix, image, suspect = await arender_page(page, settings, result["dpi"])
+
+        # Skip blank and image-only pages
+        if await asyncio.to_thread(skip_ocr, result, settings, image=image):
+            return result
+
+        try:
+            result["lines"] = await arecognize_page(image, settings, result, deadline, suspect)
+            return result
+        except TimeoutError:
+            result["timeouts"] += 1
+
+        # Retry once at a lower resolution
+        dpi = retry_resolution(result["dpi"], settings.budget, deadline)
+        if dpi is not None:
+            pix, image, _ = await arender_page(page, settings, dpi)
+            try:
+                result["lines"] = await arecognize_page(image, settings, result, deadline, suspect)
+                result.update({"dpi": dpi, "retries": 1})
+                return result
+            except TimeoutError:
+                result["timeouts"] += 1
+
+        result.update({"source": "timeout", "dpi": None})
+        return result
+
+async def arecognize_page(image, settings, result, deadline=None, suspect=False):
+    """
+    OCR a rendered page in tesseract subprocesses, as recognize_page does.
+
+    Args:
+        image (numpy.ndarray): Image array of the page.
+        settings (OcrSettings): OCR settings, with a TesseractEngine.
+        result (dict): Page result, whose "rotation" is used and updated.
+        deadline (float): time.time() by which the document budget runs out.
+        suspect (bool): Whether the page itself looks rotated (see
+            orientation_suspect).
+
+    Returns:
+        list: Lines of text on the page.
+
+    Raises:
+        TimeoutError: If the page runs over its time budget.
+    """
+    deadline = page_deadline(settings.budget, deadline)
+    config = settings.engine.config()
+
+    async def recognize(rotation):
+        prepared = await asyncio.to_thread(prepare_image, image, rotation, settings)
+        text = await run_tesseract(prepared, config, time_left(deadline))
+        return text.split("\n")
+
+    # Detect the orientation before OCR when the page itself looks rotated
+    if settings.orientation and result["rotation"] is None and suspect:
+        result["rotation"] = await adetect_rotation(image, time_left(deadline))
+
+    lines_page = await recognize(result["rotation"])
+
+    # Otherwise only when the OCR output looks garbled
+    if settings.orientation and result["rotation"] is None and ocr_output_suspect(lines_page):
+        result["rotation"] = await adetect_rotation(image, time_left(deadline))
+        if result["rotation"]:
+            lines_page = await recognize(result["rotation"])
+
+    return lines_page
+
+async def arender_page(page, settings, dpi):
+    """
+    Render a page for OCR on the render thread.
+
+    Args:
+        page (fitz.Page): Page to render.
+        settings (OcrSettings): OCR settings.
+        dpi (int): Render resolution.
+
+    Returns:
+        fitz.Pixmap: Page render, to keep alive while its image is used.
+        numpy.ndarray: Image array of the render.
+        bool: Whether the orientation should be detected before OCR.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        _render_executor, render_for_ocr, page, settings, dpi
+    )
+
+def render_for_ocr(page, settings, dpi):
+    """
+    Render a page for OCR and check whether it looks rotated. Runs on the render
+    thread, like every PyMuPDF call made while pages are OCRed.
+
+    Args:
+        page (fitz.Page): Page to render.
+        settings (OcrSettings): OCR settings.
+        dpi (int): Render resolution.
+
+    Returns:
+        fitz.Pixmap: Page render, to keep alive while its image is used.
+        numpy.ndarray: Image array of the render.
+        bool: Whether the orientation should be detected before OCR.
+    """
+    pix = render_page(page, dpi)
+    suspect = settings.orientation and orientation_suspect(page)
+    return pix, pix_to_image(pix), suspect
+
+async def adetect_rotation(image, timeout=None):
+    """
+    Detect the clockwise rotation needed to make a page upright, as
+    OcrEngine.detect_rotation does, in a tesseract subprocess.
+
+    Args:
+        image (numpy.ndarray): Image array of the page.
+        timeout (float): Seconds allowed for tesseract, None for no limit.
+
+    Returns:
+        int: Clockwise rotation in degrees (0, 90, 180 or 270). Pages with too
+            little text for orientation detection are taken as upright.
+
+    Raises:
+        TimeoutError: If tesseract runs over the timeout.
+    """
+    try:
+        osd = await run_tesseract(image, "--psm 0", timeout)
+    except pytesseract.TesseractError:
+        return 0
+
+    match = re.search(r"Rotate: (\d+)", osd)
+    return int(match.group(1)) if match else 0
+
+async def run_tesseract(image, config=OCR_CONFIG, timeout=None):
+    """
+    OCR an image in a tesseract subprocess, piping the image to its stdin.
+
+    The subprocess is killed if it runs over the timeout or the calling task is
+    cancelled.
+
+    Args:
+        image (numpy.ndarray): Image array, as built by pix_to_image.
+        config (str): Tesseract configuration flags.
+        timeout (float): Seconds allowed for tesseract, None for no limit.
+
+    Returns:
+        str: Tesseract output, the same text image_to_string returns.
+
+    Raises:
+        TimeoutError: If tesseract runs over the timeout.
+    """
+    process = await asyncio.create_subprocess_exec(
+        pytesseract.pytesseract.tesseract_cmd,
+        "stdin",
+        "stdout",
+        *shlex.split(config),
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(
+            process.communicate(pnm_header(image) + np.ascontiguousarray(image).tobytes()),
+            timeout,
+        )
+    except asyncio.TimeoutError as error:
+        process.kill()
+        await process.wait()
+        raise TimeoutError(f"tesseract ran over its {timeout:.1f}s timeout") from error
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+
+    if process.returncode != 0:
+        raise pytesseract.TesseractError(
+            process.returncode, stderr.decode("utf-8", errors="replace").strip()
+        )
+    return stdout.decode("utf-8")
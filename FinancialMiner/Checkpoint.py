@@ -0,0 +1,100 @@
+# Standard library imports
+import hashlib
+import json
+import os
+
+
+class PageJournal:
+    """
+    Append-only journal of finished page records, so an interrupted read can
+    resume where it stopped.
+
+    The journal is a JSON lines file: a header identifying the document and the
+    read settings, then one page record per line, written and synced as each
+    page finishes. A journal written for another document or other settings is
+    discarded, and a last line cut short by a crash is dropped.
+    """
+
+    def __init__(self, path, identity):
+        """
+        Args:
+            path (str): Path to the journal file, created if missing.
+            identity (str): Identity of the document and read settings, from
+                journal_identity.
+        """
+        self.path = path
+        self.identity = identity
+        self.records = {}
+
+        header = None
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    if header is None:
+                        header = entry
+                    else:
+                        self.records[entry["PAGE_NUMBER"]] = entry
+
+        if header != {"identity": identity}:
+            self.records = {}
+
+        # Rewrite the valid part of the journal before appending to it
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            for entry in [{"identity": identity}, *self.records.values()]:
+                file.write(json.dumps(entry) + "\n")
+        os.replace(temp_path, path)
+
+        self.file = open(path, "a", encoding="utf-8")
+
+    def add(self, record):
+        """
+        Write a finished page record to disk.
+
+        Args:
+            record (dict): Page record, as built by page_record.
+        """
+        self.records[record["PAGE_NUMBER"]] = record
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def remove(self):
+        """
+        Close and delete the journal, once the document is read completely.
+        """
+        self.close()
+        os.remove(self.path)
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def journal_identity(filename, settings):
+    """
+    Identify a document and the read settings its journal was written with.
+
+    Args:
+        filename (str): Path to the PDF file.
+        settings (str): Description of the read settings that change page records.
+
+    Returns:
+        str: Hex digest of the file content and settings.
+    """
+    digest = hashlib.sha256()
+    with open(filename, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    digest.update(settings.encode())
+    return digest.hexdigest()
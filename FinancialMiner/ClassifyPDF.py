@@ -1,10 +1,11 @@
-# Standard library imports
-import pickle
+# Local imports
+from . import lazy_import
+from .ModelRegistry import default_registry
 
-# Third-party imports
-import pandas as pd
-import numpy as np
-import more_itertools as mit
+# Third-party imports, loaded on first use
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+mit = lazy_import("more_itertools")
 
 def create_feature_matrix(path, vocab_filename, df):
     """
@@ -18,25 +19,60 @@ def create_feature_matrix(path, vocab_filename, df):
     Returns:
         pandas.DataFrame: Feature matrix containing word counts and dummy variables.
     """
-    with open(f"{path}{vocab_filename}") as file:
-        vocab_freq = [line.strip() for line in file]
-
-    # Creating the vocabulary matrix
-    matrix = pd.DataFrame(columns=vocab_freq)
-    for words in df["WORDS"]:
-        new_row = []
-        for column in matrix.columns:
-            if column not in words:
-                new_row.append(0)
-            else:
-                count_words = {}
-                for word in words:
-                    if word not in count_words:
-                        count_words[word] = 1
-                    else:
-                        count_words[word] += 1
-                new_row.append(count_words[column])
-        matrix.loc[len(matrix)] = new_row
+    # Vocabulary and its word index, read once per process
+    vocabulary = default_registry().vocabulary(path, vocab_filename)
+    counts = count_vocabulary_words(df["WORDS"], vocabulary.word_columns)
+
+    return vocabulary_matrix(counts, vocabulary, vocabulary.word_columns, df)
+
+
+def count_vocabulary_words(words_pages, word_columns):
+    """
+    Count the vocabulary words of every page in one pass.
+
+    Args:
+        words_pages (iterable): Words extracted from each page.
+        word_columns (dict): Column of each distinct vocabulary word.
+
+    Returns:
+        numpy.ndarray: Word counts, one row per page and one column per word.
+    """
+    page_columns = [
+        [word_columns[word] for word in words if word in word_columns]
+        for words in words_pages
+    ]
+    rows = np.repeat(
+        np.arange(len(page_columns)), [len(columns) for columns in page_columns]
+    )
+    columns = np.fromiter(
+        (column for page in page_columns for column in page), dtype=np.intp, count=len(rows)
+    )
+    counts = np.bincount(
+        rows * len(word_columns) + columns, minlength=len(page_columns) * len(word_columns)
+    )
+
+    return counts.reshape(len(page_columns), len(word_columns))
+
+
+def vocabulary_matrix(counts, vocabulary, word_columns, df):
+    """
+    Build the feature matrix of a vocabulary from word counts.
+
+    Args:
+        counts (numpy.ndarray): Word counts from count_vocabulary_words.
+        vocabulary (Vocabulary): Vocabulary of the model.
+        word_columns (dict): Column of each word in the counts, covering every
+            word of the vocabulary.
+        df (pandas.DataFrame): DataFrame containing words extracted from documents.
+
+    Returns:
+        pandas.DataFrame: Feature matrix containing word counts and dummy variables.
+    """
+    # Creating the vocabulary matrix, repeating the counts of repeated vocabulary lines
+    matrix = pd.DataFrame(
+        counts[:, [word_columns[word] for word in vocabulary.words]].astype(np.int64),
+        columns=list(vocabulary.words),
+    )
 
     # Adding dummy variables
     matrix["NUMBERS<5"] = df["NUMBERS<5"]
@@ -49,18 +85,31 @@ def create_feature_matrix(path, vocab_filename, df):
     return matrix
 
 
-def create_tfidf_vocab(feature_matrix):
+def create_tfidf_vocab(feature_matrix, idf_vocab=None):
     """
     Create TF-IDF vocabulary matrix based on the feature matrix.
 
+    Without persisted IDF weights, the IDF is computed from the pages of the
+    feature matrix itself, so a page's features depend on the other pages scored
+    with it. With them, every page is weighted the same at any batch size.
+
     Args:
         feature_matrix (pandas.DataFrame): Feature matrix with word counts and dummy variables.
+        idf_vocab (pandas.Series): Persisted IDF weight of each feature column.
 
     Returns:
         pandas.DataFrame: TF-IDF weighted feature matrix.
+
+    Raises:
+        ValueError: If the IDF weights do not cover every feature column.
     """
-    vocab_freq = np.sum(feature_matrix > 0, axis=0)
-    idf_vocab = np.log(len(feature_matrix) / vocab_freq)
+    if idf_vocab is None:
+        idf_vocab = create_idf_vector(feature_matrix)
+    elif not feature_matrix.columns.isin(idf_vocab.index).all():
+        raise ValueError("IDF weights do not match the feature matrix columns")
+    else:
+        idf_vocab = idf_vocab[feature_matrix.columns]
+
     tf_idf_vocab = feature_matrix * idf_vocab
     tf_idf_vocab["PAGE>12"] = tf_idf_vocab["PAGE>12"].apply(lambda value: value * 10)
     tf_idf_vocab.fillna(0, inplace=True)
@@ -68,6 +117,49 @@ def create_tfidf_vocab(feature_matrix):
     return tf_idf_vocab
 
 
+def create_idf_vector(feature_matrix):
+    """
+    Compute the IDF weight of each feature column over a set of pages.
+
+    Args:
+        feature_matrix (pandas.DataFrame): Feature matrix with word counts and dummy variables.
+
+    Returns:
+        pandas.Series: IDF weight of each column, 0 for columns absent from every
+            page, which then add nothing to the TF-IDF features of any page.
+    """
+    vocab_freq = np.sum(feature_matrix > 0, axis=0)
+    return np.log(len(feature_matrix) / vocab_freq.where(vocab_freq > 0)).fillna(0.0)
+
+
+def statement_idf(model_pipeline_dict):
+    """
+    Get the IDF weights a model pipeline scores pages with.
+
+    Model pipelines with "scoring" set to "page" use the IDF weights persisted
+    in their "idf_filename". The default "batch" scoring computes the IDF from
+    the pages scored together.
+
+    Args:
+        model_pipeline_dict (dict): Dictionary containing model pipeline parameters.
+
+    Returns:
+        pandas.Series: Persisted IDF weights, or None for batch scoring.
+
+    Raises:
+        ValueError: If the scoring mode is unknown.
+    """
+    scoring = model_pipeline_dict.get("scoring", "batch")
+    if scoring == "batch":
+        return None
+    if scoring == "page":
+        return default_registry().idf(
+            model_pipeline_dict["model_objects_filepath"],
+            model_pipeline_dict["idf_filename"],
+        )
+    raise ValueError(f"Unknown scoring mode: {scoring}")
+
+
 def create_model_predictions(path, model_filename, feature_df, original_df):
     """
     Create predictions using a trained model.
@@ -81,7 +173,7 @@ def create_model_predictions(path, model_filename, feature_df, original_df):
     Returns:
         pandas.DataFrame: DataFrame with file, page number, and model predictions.
     """
-    model = pickle.load(open(path + model_filename, "rb"))
+    model = default_registry().model(path, model_filename)
     y_pred = model.predict(feature_df)
 
     results = pd.DataFrame(columns=["FILE", "PAGE_NUMBER", "Y_PRED"])
@@ -124,6 +216,51 @@ def helper_clean_predictions(df_model_predictions):
     return df_grouped[["FILE", "PREDICTIONS"]]
 
 
+def create_statement_predictions(statement_dicts, df):
+    """
+    Create the predictions of several statement models from one count of the
+    page words: the words of every vocabulary are counted once, and each model
+    gets its feature matrix from the shared counts.
+
+    Args:
+        statement_dicts (dict): Model pipeline parameters of each statement type.
+        df (pandas.DataFrame): DataFrame containing data to process.
+
+    Returns:
+        dict: Cleaned predictions of each statement type.
+    """
+    registry = default_registry()
+    vocabularies = {
+        statement: registry.vocabulary(
+            model_pipeline_dict["model_objects_filepath"],
+            model_pipeline_dict["vocab_freq_filename"],
+        )
+        for statement, model_pipeline_dict in statement_dicts.items()
+    }
+
+    # Column of each word of any vocabulary
+    word_columns = {}
+    for vocabulary in vocabularies.values():
+        for word in vocabulary.word_columns:
+            word_columns.setdefault(word, len(word_columns))
+
+    counts = count_vocabulary_words(df["WORDS"], word_columns)
+
+    predictions = {}
+    for statement, model_pipeline_dict in statement_dicts.items():
+        feature_matrix = vocabulary_matrix(counts, vocabularies[statement], word_columns, df)
+        feature_df = create_tfidf_vocab(feature_matrix, statement_idf(model_pipeline_dict))
+        results_df = create_model_predictions(
+            model_pipeline_dict["model_objects_filepath"],
+            model_pipeline_dict["model_filename"],
+            feature_df,
+            df,
+        )
+        predictions[statement] = helper_clean_predictions(results_df)
+
+    return predictions
+
+
 def create_predictions(model_pipeline_dict, df):
     """
     Create predictions pipeline: feature matrix creation, TF-IDF calculation, model predictions, and cleaning.
@@ -143,7 +280,7 @@ def create_predictions(model_pipeline_dict, df):
     )
 
     # create tfidf df
-    feature_df = create_tfidf_vocab(feature_matrix)
+    feature_df = create_tfidf_vocab(feature_matrix, statement_idf(model_pipeline_dict))
 
     # predict
     results_df = create_model_predictions(
@@ -157,3 +294,42 @@ def create_predictions(model_pipeline_dict, df):
     results_df_cleaned = helper_clean_predictions(results_df)
 
     return results_df_cleaned
+
+
+def classify_page_records(statement_dicts, records):
+    """
+    Classify page records one at a time, as they stream out of iter_pages.
+
+    Pages are weighted with the persisted IDF weights of each model, whatever its
+    "scoring" mode, so a page gets the same prediction as in a "page" scoring
+    batch.
+
+    Args:
+        statement_dicts (dict): Model pipeline parameters of each statement type,
+            each with an "idf_filename".
+        records (iterable): Page records, as built by page_record.
+
+    Yields:
+        dict: Page record.
+        dict: Prediction (1 or 0) of each statement type for the page.
+    """
+    registry = default_registry()
+    models = {}
+    for statement, model_pipeline_dict in statement_dicts.items():
+        path = model_pipeline_dict["model_objects_filepath"]
+        models[statement] = (
+            registry.vocabulary(path, model_pipeline_dict["vocab_freq_filename"]),
+            registry.idf(path, model_pipeline_dict["idf_filename"]),
+            registry.model(path, model_pipeline_dict["model_filename"]),
+        )
+
+    for record in records:
+        df = pd.DataFrame([record])
+        predictions = {}
+        for statement, (vocabulary, idf_vocab, model) in models.items():
+            counts = count_vocabulary_words(df["WORDS"], vocabulary.word_columns)
+            feature_matrix = vocabulary_matrix(counts, vocabulary, vocabulary.word_columns, df)
+            predictions[statement] = int(
+                model.predict(create_tfidf_vocab(feature_matrix, idf_vocab))[0]
+            )
+        yield record, predictions
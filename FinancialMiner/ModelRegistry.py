@@ -0,0 +1,223 @@
+# Standard library imports
+import math
+import os
+import pickle
+from dataclasses import dataclass
+from functools import lru_cache
+
+# Local imports
+from . import lazy_import
+
+# Third-party imports, loaded on first use
+pd = lazy_import("pandas")
+
+
+@dataclass(frozen=True)
+class Vocabulary:
+    # Vocabulary words, in the order of
+    # the feature matrix columns
+    words: tuple[str, ...]
+
+    # Column of each distinct word in the
+    # counts built by create_feature_matrix
+    word_columns: dict
+
+
+class ModelRegistry:
+    """
+    Process-wide store of the trained models, vocabularies and IDF weights used
+    to classify pages, so each file is read once instead of on every prediction.
+
+    Entries are keyed by file path and checked against the file modification time
+    and size on every lookup; a file replaced on disk is loaded again. Load and
+    hit counts are kept on the instance for reporting.
+
+    Call preload before starting worker processes, so forked workers inherit the
+    loaded models copy-on-write instead of each unpickling its own.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.loads = 0
+        self.hits = 0
+
+    def model(self, path, model_filename):
+        """
+        Get a trained model.
+
+        Args:
+            path (str): Path to model files.
+            model_filename (str): Filename of the trained model.
+
+        Returns:
+            object: Unpickled model.
+        """
+        return self.get(f"{path}{model_filename}", load_model)
+
+    def vocabulary(self, path, vocab_filename):
+        """
+        Get a vocabulary with its word index.
+
+        Args:
+            path (str): Path to vocabulary files.
+            vocab_filename (str): Filename of vocabulary.
+
+        Returns:
+            Vocabulary: Vocabulary words and the column of each word.
+        """
+        return self.get(f"{path}{vocab_filename}", load_vocabulary)
+
+    def idf(self, path, idf_filename):
+        """
+        Get persisted IDF weights.
+
+        Args:
+            path (str): Path to model files.
+            idf_filename (str): Filename of the IDF weights.
+
+        Returns:
+            pandas.Series: IDF weight of each feature column.
+        """
+        return self.get(f"{path}{idf_filename}", load_idf)
+
+    def preload(self, model_pipeline_dict):
+        """
+        Load the model and vocabulary of a model pipeline, and its IDF weights
+        when it scores pages with them.
+
+        Args:
+            model_pipeline_dict (dict): Dictionary containing model pipeline parameters.
+        """
+        path = model_pipeline_dict["model_objects_filepath"]
+        self.vocabulary(path, model_pipeline_dict["vocab_freq_filename"])
+        self.model(path, model_pipeline_dict["model_filename"])
+        if model_pipeline_dict.get("scoring", "batch") == "page":
+            self.idf(path, model_pipeline_dict["idf_filename"])
+
+    def get(self, filepath, loader):
+        """
+        Get the object loaded from a file, loading it again if the file changed.
+
+        Args:
+            filepath (str): Path to the file.
+            loader (callable): Function loading the object from the file path.
+
+        Returns:
+            object: Loaded object.
+        """
+        stat = os.stat(filepath)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        entry = self.entries.get(filepath)
+        if entry is not None and entry[0] == signature:
+            self.hits += 1
+            return entry[1]
+
+        value = loader(filepath)
+        self.entries[filepath] = (signature, value)
+        self.loads += 1
+        return value
+
+    def clear(self):
+        """
+        Drop every loaded entry.
+        """
+        self.entries.clear()
+
+    def stats(self):
+        """
+        Report the registry activity.
+
+        Returns:
+            dict: Loaded entries, loads and hits.
+        """
+        return {"entries": len(self.entries), "loads": self.loads, "hits": self.hits}
+
+
+@lru_cache(maxsize=None)
+def default_registry():
+    """
+    The ModelRegistry shared by every classification in the process.
+
+    Returns:
+        ModelRegistry: Shared registry.
+    """
+    return ModelRegistry()
+
+
+def load_model(filepath):
+    """
+    Unpickle a trained model.
+
+    Args:
+        filepath (str): Path to the pickled model.
+
+    Returns:
+        object: Unpickled model.
+    """
+    with open(filepath, "rb") as file:
+        return pickle.load(file)
+
+
+def load_vocabulary(filepath):
+    """
+    Read a vocabulary file, one word per line, and index its distinct words.
+
+    Args:
+        filepath (str): Path to the vocabulary file.
+
+    Returns:
+        Vocabulary: Vocabulary words and the column of each word.
+    """
+    with open(filepath) as file:
+        words = tuple(line.strip() for line in file)
+
+    word_columns = {}
+    for word in words:
+        word_columns.setdefault(word, len(word_columns))
+
+    return Vocabulary(words, word_columns)
+
+
+def load_idf(filepath):
+    """
+    Read IDF weights written by save_idf.
+
+    Args:
+        filepath (str): Path to the IDF file.
+
+    Returns:
+        pandas.Series: IDF weight of each feature column.
+
+    Raises:
+        ValueError: If a weight is not a finite number.
+    """
+    columns = []
+    weights = []
+    with open(filepath) as file:
+        for line in file:
+            column, weight = line.rstrip("\n").rsplit("\t", 1)
+            weight = float(weight)
+            if not math.isfinite(weight):
+                raise ValueError(f"IDF weight of {column!r} in {filepath} is not finite: {weight}")
+            columns.append(column)
+            weights.append(weight)
+
+    return pd.Series(weights, index=columns, dtype=float)
+
+
+def save_idf(filepath, idf_vocab):
+    """
+    Write IDF weights, one "column<TAB>weight" line per feature column.
+
+    Weights are written with repr, so they are read back exactly. Repeated
+    columns are written once.
+
+    Args:
+        filepath (str): Path to the IDF file.
+        idf_vocab (pandas.Series): IDF weight of each feature column.
+    """
+    idf_vocab = idf_vocab[~idf_vocab.index.duplicated()]
+    with open(filepath, "w") as file:
+        for column, weight in idf_vocab.items():
+            file.write(f"{column}\t{float(weight)!r}\n")
@@ -0,0 +1,369 @@
+# Standard library imports
+import hashlib
+import json
+import sqlite3
+import time
+from functools import lru_cache
+
+# Local imports
+from . import lazy_import
+
+# Third-party imports, loaded on first use
+np = lazy_import("numpy")
+
+# Part of every page cache key, raised when entries written by earlier versions
+# must not be reused (2: blank and image-only pages were cached as empty text)
+CACHE_KEY_VERSION = 2
+
+
+class OcrCache:
+    """
+    Persistent, content-addressed cache of per-page OCR lines.
+
+    Entries live in a SQLite database and are evicted least recently used first
+    once the stored text grows past max_bytes. Hit and miss counts are kept on
+    the instance for reporting. The detected orientation of each page is kept
+    alongside, keyed by page content only.
+
+    Pages can also be indexed by a perceptual fingerprint (see image_fingerprint),
+    so near-duplicate pages, such as the same statement re-filed in another
+    document, reuse the OCR output of the first copy.
+    """
+
+    def __init__(self, path="ocr_cache.sqlite", max_bytes=256 * 1024 * 1024):
+        """
+        Args:
+            path (str): Path to the SQLite database file, created if missing.
+            max_bytes (int): Size budget for the cached text before eviction.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.dedup_hits = 0
+        self.dedup_misses = 0
+
+        # In-memory fingerprint indexes by OCR configuration, loaded on first use
+        self.fingerprint_indexes = {}
+
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS pages "
+            "(key TEXT PRIMARY KEY, lines TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS orientations (key TEXT PRIMARY KEY, rotation INTEGER NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints "
+            "(key TEXT PRIMARY KEY, config TEXT NOT NULL, fingerprint BLOB NOT NULL)"
+        )
+        self.connection.commit()
+
+    def get(self, key):
+        """
+        Look up the cached lines for a key.
+
+        Args:
+            key (str): Cache key from page_cache_key.
+
+        Returns:
+            list: Cached lines of text, or None on a miss.
+        """
+        row = self.connection.execute(
+            "SELECT lines FROM pages WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.connection.execute(
+            "UPDATE pages SET last_used = ? WHERE key = ?", (time.time(), key)
+        )
+        self.connection.commit()
+        return json.loads(row[0])
+
+    def put(self, key, lines):
+        """
+        Store the lines for a key and evict old entries if over budget.
+
+        Args:
+            key (str): Cache key from page_cache_key.
+            lines (list): Lines of text to store.
+        """
+        value = json.dumps(lines)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO pages (key, lines, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, value, len(value.encode("utf-8")), time.time()),
+        )
+        self.evict()
+        self.connection.commit()
+
+    def evict(self):
+        """
+        Delete least recently used entries until the cache fits in max_bytes.
+        """
+        total = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM pages"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        expired = []
+        for key, size in self.connection.execute(
+            "SELECT key, size FROM pages ORDER BY last_used"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            expired.append((key,))
+            total -= size
+
+        self.connection.executemany("DELETE FROM pages WHERE key = ?", expired)
+        self.connection.executemany("DELETE FROM fingerprints WHERE key = ?", expired)
+        self.fingerprint_indexes.clear()
+
+    def get_rotation(self, content_hash):
+        """
+        Look up the detected rotation of a page.
+
+        Args:
+            content_hash (str): Page content hash from page_content_hash.
+
+        Returns:
+            int: Clockwise rotation of the page, or None if it was never detected.
+        """
+        row = self.connection.execute(
+            "SELECT rotation FROM orientations WHERE key = ?", (content_hash,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def put_rotation(self, content_hash, rotation):
+        """
+        Store the detected rotation of a page.
+
+        Args:
+            content_hash (str): Page content hash from page_content_hash.
+            rotation (int): Clockwise rotation of the page.
+        """
+        self.connection.execute(
+            "INSERT OR REPLACE INTO orientations (key, rotation) VALUES (?, ?)",
+            (content_hash, rotation),
+        )
+        self.connection.commit()
+
+    def find_similar(self, fingerprint, config, threshold):
+        """
+        Look up the cached lines of the most similar fingerprinted page.
+
+        Args:
+            fingerprint (numpy.ndarray): Packed fingerprint bits of the page.
+            config (str): OCR configuration the output must have been produced
+                with (render resolution, engine settings and version).
+            threshold (float): Largest share of fingerprint bits that may differ.
+
+        Returns:
+            list: Cached lines of text of the most similar page, or None if no
+                page is within the threshold.
+        """
+        index = self.fingerprint_index(config)
+        key = index.nearest(fingerprint, threshold)
+        row = None
+        if key is not None:
+            row = self.connection.execute(
+                "SELECT lines FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            self.dedup_misses += 1
+            return None
+
+        self.dedup_hits += 1
+        self.connection.execute(
+            "UPDATE pages SET last_used = ? WHERE key = ?", (time.time(), key)
+        )
+        self.connection.commit()
+        return json.loads(row[0])
+
+    def put_fingerprint(self, key, config, fingerprint):
+        """
+        Index the fingerprint of a cached page.
+
+        Args:
+            key (str): Cache key the page lines are stored under.
+            config (str): OCR configuration the lines were produced with.
+            fingerprint (numpy.ndarray): Packed fingerprint bits of the page.
+        """
+        self.connection.execute(
+            "INSERT OR REPLACE INTO fingerprints (key, config, fingerprint) VALUES (?, ?, ?)",
+            (key, config, fingerprint.tobytes()),
+        )
+        self.connection.commit()
+        if config in self.fingerprint_indexes:
+            self.fingerprint_indexes[config].add(key, fingerprint)
+
+    def fingerprint_index(self, config):
+        """
+        Args:
+            config (str): OCR configuration.
+
+        Returns:
+            FingerprintIndex: In-memory index of the fingerprints stored for the
+                configuration, loaded from the database on first use.
+        """
+        if config not in self.fingerprint_indexes:
+            index = FingerprintIndex()
+            for key, fingerprint in self.connection.execute(
+                "SELECT key, fingerprint FROM fingerprints WHERE config = ?", (config,)
+            ):
+                index.add(key, np.frombuffer(fingerprint, dtype=np.uint8))
+            self.fingerprint_indexes[config] = index
+        return self.fingerprint_indexes[config]
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit and miss counts since the cache was opened, for exact and
+                near-duplicate (dedup) lookups.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "dedup_hits": self.dedup_hits,
+            "dedup_misses": self.dedup_misses,
+        }
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class FingerprintIndex:
+    """
+    Page fingerprints held in one array, searched by Hamming distance.
+
+    The array grows by doubling, so adding a page does not copy the index.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.fingerprints = None
+
+    def add(self, key, fingerprint):
+        """
+        Args:
+            key (str): Cache key of the page.
+            fingerprint (numpy.ndarray): Packed fingerprint bits of the page.
+        """
+        if self.fingerprints is None:
+            self.fingerprints = np.empty((16, fingerprint.size), dtype=np.uint8)
+        elif len(self.keys) == len(self.fingerprints):
+            self.fingerprints = np.concatenate([self.fingerprints, np.empty_like(self.fingerprints)])
+
+        self.fingerprints[len(self.keys)] = fingerprint
+        self.keys.append(key)
+
+    def nearest(self, fingerprint, threshold):
+        """
+        Args:
+            fingerprint (numpy.ndarray): Packed fingerprint bits of the page.
+            threshold (float): Largest share of bits that may differ.
+
+        Returns:
+            str: Key of the closest indexed page, or None if none is within the
+                threshold.
+        """
+        if not self.keys:
+            return None
+
+        fingerprints = self.fingerprints[: len(self.keys)]
+        distances = popcount_table()[np.bitwise_xor(fingerprints, fingerprint)].sum(axis=1)
+        best = int(np.argmin(distances))
+        if distances[best] > threshold * fingerprint.size * 8:
+            return None
+        return self.keys[best]
+
+
+def page_content_hash(page):
+    """
+    Hash the content of a PDF page without rendering it.
+
+    The hash covers the page content streams, the raw streams of the images and
+    form XObjects it draws, the programs of its embedded fonts, the appearance of
+    its annotations and its geometry, so identical pages hash the same across
+    files and re-saved documents. Fonts matter because documents from the same
+    generator can share content stream bytes that draw other glyphs through
+    other subset fonts, and annotations are drawn into the render.
+
+    Args:
+        page (fitz.Page): Page to hash.
+
+    Returns:
+        str: Hex digest of the page content.
+    """
+    doc = page.parent
+    digest = hashlib.sha256()
+    digest.update(page.read_contents())
+
+    for image in page.get_images(full=True):
+        digest.update(doc.xref_stream_raw(image[0]) or b"")
+    for xobject in page.get_xobjects():
+        digest.update(doc.xref_stream_raw(xobject[0]) or b"")
+    for font in page.get_fonts(full=True):
+        # Base font name, encoding and font program
+        digest.update(repr(font[3:6]).encode())
+        digest.update(doc.extract_font(font[0])[3] or b"")
+
+    for xref, _, _ in page.annot_xrefs():
+        for key in ("Subtype", "Rect", "F", "AS"):
+            digest.update(repr(doc.xref_get_key(xref, key)).encode())
+
+        # The normal appearance stream, of the current state for annotations
+        # with several (check boxes, radio buttons)
+        kind, value = doc.xref_get_key(xref, "AP/N")
+        if kind == "dict":
+            state = doc.xref_get_key(xref, "AS")[1].lstrip("/")
+            kind, value = doc.xref_get_key(xref, f"AP/N/{state}")
+        if kind == "xref":
+            digest.update(doc.xref_stream_raw(int(value.split()[0])) or b"")
+        else:
+            # Without one the appearance is built from the annotation itself
+            digest.update(doc.xref_object(xref, compressed=True).encode())
+
+    digest.update(repr((tuple(page.rect), page.rotation)).encode())
+    return digest.hexdigest()
+
+
+def page_cache_key(content_hash, dpi, config, engine_version):
+    """
+    Build the cache key for the OCR output of a page.
+
+    Args:
+        content_hash (str): Page content hash from page_content_hash.
+        dpi (int): Render resolution.
+        config (str): OCR engine configuration (e.g. tesseract psm flags).
+        engine_version (str): OCR engine version.
+
+    Returns:
+        str: Cache key.
+    """
+    key = f"{CACHE_KEY_VERSION}|{content_hash}|{dpi}|{config}|{engine_version}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def popcount_table():
+    """
+    Number of set bits in each byte value, built on first use.
+
+    Returns:
+        numpy.ndarray: uint16 array of 256 bit counts.
+    """
+    return np.array([bin(value).count("1") for value in range(256)], dtype=np.uint16)
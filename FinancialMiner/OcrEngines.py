@@ -0,0 +1,470 @@
+# Standard library imports
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import tempfile
+from functools import lru_cache
+
+# Local imports
+from . import lazy_import
+
+# Third-party imports, loaded on first use
+np = lazy_import("numpy")
+pytesseract = lazy_import("pytesseract")
+
+# Tesseract configuration used for OCR
+OCR_CONFIG = r"--psm 6"
+
+# EasyOCR readers, loaded once per process and keyed by languages
+_easyocr_readers = {}
+
+
+class OcrEngine:
+    """
+    Interface of the OCR backends read() dispatches to.
+
+    An engine turns page image arrays (as built by pix_to_image) into lists of
+    text lines, the same contract as text_dict[filename][page]. Engines must be
+    picklable so they can be sent to worker processes, so any heavy state (models,
+    readers) is loaded lazily in the process that uses it.
+
+    Engines that can stop a page mid-way honour the timeout arguments and raise
+    TimeoutError when a page takes longer; the others ignore them.
+
+    Orientation detection uses tesseract whichever engine OCRs the pages, and
+    is skipped when tesseract is not installed.
+    """
+
+    name = "base"
+
+    def recognize(self, image, timeout=None):
+        """
+        Extract text lines from a page image.
+
+        Args:
+            image (numpy.ndarray): Image array of the page.
+            timeout (float): Seconds allowed for the page, None for no limit.
+
+        Returns:
+            list: Lines of text on the page.
+        """
+        raise NotImplementedError
+
+    def recognize_batch(self, images, timeout=None):
+        """
+        Extract text lines from several page images.
+
+        The default implementation OCRs the images one by one, consuming the
+        iterable lazily so only one page is held in memory at a time.
+
+        Args:
+            images (iterable): Image arrays of the pages.
+            timeout (float): Seconds allowed per page, None for no limit.
+
+        Returns:
+            list: Lines of text for each image, in the given order.
+        """
+        return [self.recognize(image, timeout) for image in images]
+
+    def recognize_with_confidence(self, image, timeout=None):
+        """
+        Extract text lines from a page image, along with word confidences.
+
+        Args:
+            image (numpy.ndarray): Image array of the page.
+            timeout (float): Seconds allowed for the page, None for no limit.
+
+        Returns:
+            list: Lines of text on the page.
+            list: (word, confidence) tuples, confidences from 0 to 100.
+        """
+        raise NotImplementedError
+
+    def detect_rotation(self, image, timeout=None):
+        """
+        Detect the clockwise rotation needed to make a page upright.
+
+        Args:
+            image (numpy.ndarray): Image array of the page.
+            timeout (float): Seconds allowed, None for no limit.
+
+        Returns:
+            int: Clockwise rotation in degrees (0, 90, 180 or 270). Pages with too
+                little text for orientation detection, or read on a host without
+                tesseract, are taken as upright.
+        """
+        if not tesseract_available():
+            return 0
+        return tesseract_rotation(image, timeout)
+
+    def version(self):
+        """
+        Returns:
+            str: Version of the underlying OCR library, used in cache keys.
+        """
+        raise NotImplementedError
+
+    def config(self):
+        """
+        Returns:
+            str: Description of the engine configuration, used in cache keys.
+        """
+        return self.name
+
+
+class TesseractEngine(OcrEngine):
+    """
+    OCR with tesseract, the page image being piped to the tesseract process as
+    raw PNM (see run_tesseract).
+
+    With batched set, recognize_batch sends every image of the batch to a single
+    tesseract process instead of starting one process per page.
+    """
+
+    name = "tesseract"
+
+    def __init__(self, config=OCR_CONFIG, batched=False):
+        """
+        Args:
+            config (str): Tesseract configuration flags.
+            batched (bool): OCR a whole batch with a single tesseract process.
+        """
+        self.tesseract_config = config
+        self.batched = batched
+
+    def recognize(self, image, timeout=None):
+        text = run_tesseract(image, self.tesseract_config, timeout)
+
+        # Split text into lines
+        return text.split("\n")
+
+    def recognize_batch(self, images, timeout=None):
+        if not self.batched:
+            return super().recognize_batch(images, timeout)
+        return ocr_images_batched(images, self.tesseract_config, timeout)
+
+    def recognize_with_confidence(self, image, timeout=None):
+        data = tsv_to_dict(run_tesseract(image, f"{self.tesseract_config} tsv", timeout))
+
+        # Rebuild the lines from the words, with a blank line between paragraphs
+        lines, words = [], []
+        line_key = None
+        for text, confidence, block, paragraph, line in zip(
+            data["text"], data["conf"], data["block_num"], data["par_num"], data["line_num"]
+        ):
+            if float(confidence) < 0 or not text.strip():
+                continue
+            words.append((text, float(confidence)))
+
+            if line_key is not None and (block, paragraph, line) == line_key:
+                lines[-1] += " " + text
+                continue
+            if line_key is not None and (block, paragraph) != line_key[:2]:
+                lines.append("")
+            lines.append(text)
+            line_key = (block, paragraph, line)
+
+        return lines, words
+
+    def version(self):
+        return tesseract_version()
+
+    def config(self):
+        return self.tesseract_config
+
+
+class EasyOcrEngine(OcrEngine):
+    """
+    OCR with EasyOCR on the CPU.
+
+    The EasyOCR reader is loaded once per process and pages are recognized in
+    batched calls. Detected text boxes are grouped into rows so the output follows
+    the same line-list contract as tesseract. Recognition runs in-process and
+    cannot be interrupted, so timeouts are ignored.
+    """
+
+    name = "easyocr"
+
+    def __init__(self, languages=("en",), batch_size=8):
+        """
+        Args:
+            languages (tuple): EasyOCR language codes.
+            batch_size (int): Number of text boxes recognized per model call.
+        """
+        self.languages = tuple(languages)
+        self.batch_size = batch_size
+
+    def reader(self):
+        """
+        Returns:
+            easyocr.Reader: The reader for this engine's languages, loaded on first use.
+        """
+        if self.languages not in _easyocr_readers:
+            import easyocr
+
+            _easyocr_readers[self.languages] = easyocr.Reader(
+                list(self.languages), gpu=False, verbose=False
+            )
+        return _easyocr_readers[self.languages]
+
+    def recognize(self, image, timeout=None):
+        return self.recognize_batch([image])[0]
+
+    def recognize_with_confidence(self, image, timeout=None):
+        detections = self.reader().readtext(np.array(image))
+        words = [(text, confidence * 100) for _, text, confidence in detections]
+        return words_to_lines(box_to_word(box, text) for box, text, _ in detections), words
+
+    def recognize_batch(self, images, timeout=None):
+        # The whole batch is held at once, so copy the images out of their
+        # pixmaps (pix_to_image only returns views)
+        images = [np.array(image) for image in images]
+        results = [None] * len(images)
+
+        # The batched detector needs images of one size, so group them by shape
+        shapes = {}
+        for index, image in enumerate(images):
+            shapes.setdefault(image.shape, []).append(index)
+
+        for indexes in shapes.values():
+            detections = self.reader().readtext_batched(
+                [images[index] for index in indexes], batch_size=self.batch_size
+            )
+            for index, page_detections in zip(indexes, detections):
+                results[index] = words_to_lines(
+                    box_to_word(box, text) for box, text, _ in page_detections
+                )
+
+        return results
+
+    def version(self):
+        import easyocr
+
+        return easyocr.__version__
+
+    def config(self):
+        return f"{self.name} {','.join(self.languages)}"
+
+
+def box_to_word(box, text):
+    """
+    Args:
+        box (list): Corner points of an EasyOCR detection.
+        text (str): Detected text.
+
+    Returns:
+        tuple: (x0, y0, x1, y1, text) bounding box of the detection.
+    """
+    xs = [point[0] for point in box]
+    ys = [point[1] for point in box]
+    return min(xs), min(ys), max(xs), max(ys), text
+
+
+def words_to_lines(words):
+    """
+    Group positioned words into text lines by their vertical position.
+
+    A word starts a new line when its vertical centre is below the current line
+    by more than half the line height. Words on a line are joined left to right.
+
+    Args:
+        words (iterable): (x0, y0, x1, y1, text) tuples.
+
+    Returns:
+        list: Lines of text, top to bottom.
+    """
+    rows = []
+    for word in sorted(words, key=lambda w: (w[1] + w[3]) / 2):
+        center = (word[1] + word[3]) / 2
+        if rows and center - rows[-1]["center"] <= rows[-1]["height"] / 2:
+            rows[-1]["words"].append(word)
+        else:
+            rows.append({"center": center, "height": word[3] - word[1], "words": [word]})
+
+    return [" ".join(w[4] for w in sorted(row["words"], key=lambda w: w[0])) for row in rows]
+
+
+def ocr_images_batched(images, config=OCR_CONFIG, timeout=None):
+    """
+    OCR several images with a single tesseract process.
+
+    Each image is written as an uncompressed PNM file and tesseract reads them all
+    from a list file, so the language data is loaded once for the whole batch.
+    Tesseract ends every page with a form feed, which is used to split the output
+    back into pages.
+
+    Args:
+        images (iterable): NumPy arrays of the page images, as built by pix_to_image.
+        config (str): Tesseract configuration flags.
+        timeout (float): Seconds allowed per page. The tesseract process is killed
+            and TimeoutError raised when the whole batch takes longer than this
+            times its number of pages.
+
+    Returns:
+        list: Lines of text for each image, in the given order. These match what
+            image_to_string returns for the images one by one.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        image_paths = []
+        for image in images:
+            image_paths.append(os.path.join(tmp_dir, f"page_{len(image_paths)}.pnm"))
+            write_pnm(image_paths[-1], image)
+
+        if not image_paths:
+            return []
+
+        list_path = os.path.join(tmp_dir, "pages.txt")
+        with open(list_path, "w") as file:
+            file.write("\n".join(image_paths) + "\n")
+
+        try:
+            output = subprocess.run(
+                [pytesseract.pytesseract.tesseract_cmd, list_path, "stdout", *shlex.split(config)],
+                capture_output=True,
+                check=True,
+                timeout=None if timeout is None else timeout * len(image_paths),
+            ).stdout.decode("utf-8")
+        except subprocess.TimeoutExpired as error:
+            raise TimeoutError(
+                f"Tesseract timed out on a batch of {len(image_paths)} pages"
+            ) from error
+
+    texts = output.split("\f")
+    if len(texts) != len(image_paths) + 1:
+        raise RuntimeError(
+            f"Expected {len(image_paths)} pages from tesseract, got {len(texts) - 1}"
+        )
+
+    return [(text + "\f").split("\n") for text in texts[:-1]]
+
+
+def write_pnm(path, image):
+    """
+    Write an image array as a binary PGM (grayscale) or PPM (RGB) file.
+
+    Args:
+        path (str): Output file path.
+        image (numpy.ndarray): Image array of shape (height, width) or
+            (height, width, channels).
+    """
+    with open(path, "wb") as file:
+        file.write(pnm_header(image))
+        file.write(np.ascontiguousarray(image).data)
+
+
+def pnm_header(image):
+    """
+    Args:
+        image (numpy.ndarray): Image array of shape (height, width) or
+            (height, width, channels).
+
+    Returns:
+        bytes: Binary PGM (grayscale) or PPM (RGB) header for the image, to be
+            followed by its raw samples.
+    """
+    channels = 1 if image.ndim == 2 else image.shape[2]
+    magic = {1: b"P5", 3: b"P6"}[channels]
+    return b"%s\n%d %d\n255\n" % (magic, image.shape[1], image.shape[0])
+
+
+def run_tesseract(image, config=OCR_CONFIG, timeout=None):
+    """
+    OCR an image in a tesseract process, piping the image to its stdin.
+
+    The raw samples are sent behind a PNM header, instead of pytesseract copying
+    the array into a PIL image and encoding it as a PNG file for tesseract to
+    decode again.
+
+    Args:
+        image (numpy.ndarray): Image array, as built by pix_to_image.
+        config (str): Tesseract configuration flags.
+        timeout (float): Seconds allowed for tesseract, None for no limit.
+
+    Returns:
+        str: Tesseract output, the same text image_to_string returns.
+
+    Raises:
+        TimeoutError: If tesseract runs over the timeout; the process is killed.
+        pytesseract.TesseractError: If tesseract fails.
+    """
+    try:
+        completed = subprocess.run(
+            [pytesseract.pytesseract.tesseract_cmd, "stdin", "stdout", *shlex.split(config)],
+            input=pnm_header(image) + np.ascontiguousarray(image).tobytes(),
+            capture_output=True,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired as error:
+        raise TimeoutError(f"tesseract ran over its {timeout:.1f}s timeout") from error
+
+    if completed.returncode != 0:
+        raise pytesseract.TesseractError(
+            completed.returncode, completed.stderr.decode("utf-8", errors="replace").strip()
+        )
+    return completed.stdout.decode("utf-8")
+
+
+def tsv_to_dict(tsv):
+    """
+    Parse the TSV output of tesseract the way image_to_data does with
+    Output.DICT.
+
+    Args:
+        tsv (str): Tesseract TSV output, with a header row.
+
+    Returns:
+        dict: List of values of each column. The text of rows without any is "".
+    """
+    rows = [line.split("\t") for line in tsv.splitlines() if line]
+    header = rows[0]
+    data = {column: [] for column in header}
+    for row in rows[1:]:
+        row += [""] * (len(header) - len(row))
+        for column, value in zip(header, row):
+            data[column].append(value)
+    return data
+
+
+def tesseract_rotation(image, timeout=None):
+    """
+    Detect the clockwise rotation needed to make a page upright with tesseract
+    orientation detection.
+
+    Args:
+        image (numpy.ndarray): Image array of the page.
+        timeout (float): Seconds allowed, None for no limit.
+
+    Returns:
+        int: Clockwise rotation in degrees (0, 90, 180 or 270). Pages with too
+            little text for orientation detection are taken as upright.
+
+    Raises:
+        TimeoutError: If tesseract runs over the timeout.
+    """
+    try:
+        osd = run_tesseract(image, "--psm 0", timeout)
+    except pytesseract.TesseractError:
+        return 0
+
+    match = re.search(r"Rotate: (\d+)", osd)
+    return int(match.group(1)) if match else 0
+
+
+@lru_cache(maxsize=None)
+def tesseract_available():
+    """
+    Returns:
+        bool: Whether the tesseract binary can be found.
+    """
+    return shutil.which(pytesseract.pytesseract.tesseract_cmd) is not None
+
+
+@lru_cache(maxsize=None)
+def tesseract_version():
+    """
+    Returns:
+        str: Version of the installed tesseract binary.
+    """
+    return str(pytesseract.get_tesseract_version())
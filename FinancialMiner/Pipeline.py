@@ -0,0 +1,168 @@
+# Local imports
+from .Read import iter_pages, read, toc_target_pages, OCR_DPI
+from .ClassifyPDF import classify_page_records, create_statement_predictions
+from .ModelRegistry import default_registry
+
+# Render resolution for the classification pass. The classifier only needs
+# bag-of-words features, which survive a much cheaper render.
+CLASSIFY_DPI = 100
+
+
+def read_and_classify(
+    filename,
+    model_pipeline_dict,
+    classify_dpi=CLASSIFY_DPI,
+    workers=1,
+    text_layer=True,
+    cache=None,
+):
+    """
+    Read a PDF in two passes: classify every page from a cheap low-DPI read, then
+    OCR only the predicted pages at full resolution.
+
+    When the model pipeline lists "toc_patterns" and the PDF outline has matching
+    entries, only a window of "toc_window" pages around them is read and
+    classified. Otherwise every page is.
+
+    Args:
+        filename (str): Path to the PDF file.
+        model_pipeline_dict (dict): Dictionary containing model pipeline parameters.
+        classify_dpi (int): Render resolution for the classification pass.
+        workers (int): Number of OCR worker processes.
+        text_layer (bool): Use the embedded PDF text layer when it is usable.
+        cache (OcrCache): Optional on-disk OCR cache.
+
+    Returns:
+        pandas.DataFrame: Classification features per page (from the low-DPI pass).
+        dict: Extracted text per page. Predicted pages hold full resolution text,
+            the other pages keep their low-DPI text.
+        pandas.DataFrame: Cleaned model predictions.
+    """
+    df, text_dict, model_dfs = read_and_classify_statements(
+        filename,
+        {"statement": model_pipeline_dict},
+        classify_dpi,
+        workers,
+        text_layer,
+        cache,
+    )
+    return df, text_dict, model_dfs["statement"]
+
+
+def read_and_classify_statements(
+    filename,
+    statement_dicts,
+    classify_dpi=CLASSIFY_DPI,
+    workers=1,
+    text_layer=True,
+    cache=None,
+):
+    """
+    Read a PDF once and classify its pages for several statement types.
+
+    Pages are read and tokenized once at a low resolution, every statement model
+    is scored on the same word counts, and the pages predicted for any statement
+    are OCRed again at full resolution in a single pass.
+
+    The read is restricted to the outline pages matched by the "toc_patterns" of
+    the statements (with their "toc_window") only when every statement lists
+    patterns and finds a match. Otherwise every page is read.
+
+    Args:
+        filename (str): Path to the PDF file.
+        statement_dicts (dict): Model pipeline parameters of each statement type,
+            for example {"income": {...}, "financial_position": {...}}.
+        classify_dpi (int): Render resolution for the classification pass.
+        workers (int): Number of OCR worker processes.
+        text_layer (bool): Use the embedded PDF text layer when it is usable.
+        cache (OcrCache): Optional on-disk OCR cache.
+
+    Returns:
+        pandas.DataFrame: Classification features per page (from the low-DPI pass).
+        dict: Extracted text per page. Predicted pages hold full resolution text,
+            the other pages keep their low-DPI text.
+        dict: Cleaned model predictions of each statement type.
+    """
+    # Restrict the read to the statement pages listed in the outline, if any
+    pages = set()
+    for model_pipeline_dict in statement_dicts.values():
+        target_pages = None
+        if model_pipeline_dict.get("toc_patterns"):
+            target_pages = toc_target_pages(
+                filename,
+                model_pipeline_dict["toc_patterns"],
+                model_pipeline_dict.get("toc_window", 1),
+            )
+        if target_pages is None:
+            pages = None
+            break
+        pages.update(target_pages)
+    if pages is not None:
+        pages = sorted(pages)
+
+    # Load the models before the OCR workers start, so they share them
+    for model_pipeline_dict in statement_dicts.values():
+        default_registry().preload(model_pipeline_dict)
+
+    # Classification pass
+    df, text_dict = read(
+        filename, workers, text_layer, cache, dpi=classify_dpi, pages=pages
+    )
+    model_dfs = create_statement_predictions(statement_dicts, df)
+
+    # Full resolution pass, only for the predicted pages that went through OCR
+    predicted_pages = {
+        page
+        for model_df in model_dfs.values()
+        for pages in model_df["PREDICTIONS"]
+        for page in pages
+    }
+    ocr_pages = df.loc[
+        df["PAGE_NUMBER"].isin(predicted_pages) & (df["SOURCE"] != "text"),
+        "PAGE_NUMBER",
+    ].tolist()
+
+    if ocr_pages and classify_dpi != OCR_DPI:
+        _, full_text_dict = read(
+            filename, workers, text_layer, cache, dpi=OCR_DPI, pages=ocr_pages
+        )
+        text_dict[filename].update(full_text_dict[filename])
+
+    return df, text_dict, model_dfs
+
+
+def iter_classified_pages(
+    filename,
+    statement_dicts,
+    dpi=OCR_DPI,
+    workers=1,
+    text_layer=True,
+    cache=None,
+    pages=None,
+):
+    """
+    Read a PDF in a single pass and classify each page as soon as it is read.
+
+    Pages are scored one at a time with the persisted IDF weights of each model
+    (its "idf_filename"), so predictions do not depend on the rest of the
+    document and the first pages can be used while later ones are still OCRed.
+
+    Args:
+        filename (str): Path to the PDF file.
+        statement_dicts (dict): Model pipeline parameters of each statement type.
+        dpi (int): Render resolution for OCRed pages.
+        workers (int): Number of OCR worker processes.
+        text_layer (bool): Use the embedded PDF text layer when it is usable.
+        cache (OcrCache): Optional on-disk OCR cache.
+        pages (list): Zero-based page numbers to read. Defaults to every page.
+
+    Yields:
+        dict: Page record, as built by page_record.
+        dict: Prediction (1 or 0) of each statement type for the page.
+    """
+    # The models are loaded before the first page is read, so before the OCR
+    # workers start
+    yield from classify_page_records(
+        statement_dicts,
+        iter_pages(filename, workers, text_layer, cache, dpi=dpi, pages=pages),
+    )
@@ -0,0 +1,391 @@
+# Standard library imports
+from dataclasses import dataclass
+
+# Local imports
+from . import lazy_import
+
+# Third-party imports, loaded on first use
+np = lazy_import("numpy")
+
+
+@dataclass(frozen=True)
+class BlankPageRules:
+    # Percentile of the gray levels taken as the
+    # paper background; the levels below are for
+    # white paper and are scaled to it, so scans
+    # of dark or tinted paper are measured like
+    # white ones
+    background_percentile: float = 95.0
+
+    # Gray level below which a pixel
+    # counts as ink
+    ink_level: int = 128
+
+    # Pages with a smaller share of ink pixels
+    # are blank (a single line of text on a
+    # letter page is around 0.001)
+    blank_ink_density: float = 0.0003
+
+    # Pages with a larger share of mid-tone
+    # pixels and a smaller share of sharp edges
+    # are photos or drawings without text
+    image_midtone_density: float = 0.4
+    image_edge_density: float = 0.03
+
+    # Difference in gray level between neighbouring
+    # pixels that counts as a sharp edge
+    edge_level: int = 64
+
+    # Only every n-th row and column is looked at
+    subsample: int = 2
+
+
+def blank_page_type(image, rules=BlankPageRules()):
+    """
+    Detect blank and image-only pages from their rendered image, before OCR.
+
+    Text pages are mostly background with a little very dark ink and many sharp
+    edges. Blank pages have almost no ink, and photo pages have large areas of
+    mid-tones with few sharp edges. Gray levels are measured relative to the
+    paper background, so a scan of gray paper is not taken for a photo.
+
+    Args:
+        image (numpy.ndarray): Image array of the page, as built by pix_to_image.
+        rules (BlankPageRules): Detection thresholds.
+
+    Returns:
+        str: "blank" or "image" for pages that can skip OCR, None otherwise.
+    """
+    sample = image[:: rules.subsample, :: rules.subsample]
+    if sample.ndim == 3:
+        sample = sample[:, :, :3].mean(axis=2)
+    sample = sample.astype(np.int16)
+
+    # Number of pixels darker than each gray level, from which the background
+    # is read and the thresholds, set for white paper, are scaled to it
+    darker = np.concatenate(([0], np.cumsum(np.bincount(sample.ravel(), minlength=256))))
+    background = np.searchsorted(darker, sample.size * rules.background_percentile / 100) - 1
+    scale = max(background, 1) / 255
+
+    def share_below(level):
+        return darker[min(int(np.ceil(level * scale)), 256)] / sample.size
+
+    ink_density = share_below(rules.ink_level)
+    if ink_density < rules.blank_ink_density:
+        return "blank"
+
+    midtone_density = share_below(192) - share_below(64)
+    edge_density = np.count_nonzero(
+        np.abs(np.diff(sample, axis=1)) > rules.edge_level * scale
+    ) / sample.size
+    if (
+        midtone_density > rules.image_midtone_density
+        and edge_density < rules.image_edge_density
+    ):
+        return "image"
+
+    return None
+
+
+@dataclass(frozen=True)
+class PreprocessRules:
+    # Threshold each pixel against the mean of
+    # its neighbourhood, which handles uneven
+    # scan backgrounds
+    binarize: bool = True
+
+    # Size in pixels of the neighbourhood, and
+    # how much darker than its mean a pixel must
+    # be to count as ink
+    binarize_window: int = 31
+    binarize_offset: int = 15
+
+    # Straighten pages scanned slightly askew,
+    # searching angles up to max_skew_angle degrees
+    deskew: bool = True
+    max_skew_angle: float = 3.0
+    skew_step: float = 0.25
+
+    # Crop empty margins, keeping a border of
+    # margin pixels around the ink
+    crop_margins: bool = True
+    margin: int = 10
+
+    # Downscale pages whose x-height (in pixels)
+    # is above this, None to keep the scale
+    target_x_height: int | None = 30
+
+
+def preprocess_image(image, rules=PreprocessRules()):
+    """
+    Prepare a rendered page for OCR.
+
+    Runs grayscale conversion, adaptive binarization, small-angle deskew, margin
+    cropping and downscaling to a target x-height, as enabled in the rules. Smaller,
+    cleaner inputs make tesseract noticeably faster.
+
+    Args:
+        image (numpy.ndarray): Image array of the page, as built by pix_to_image.
+        rules (PreprocessRules): Preprocessing steps and their parameters.
+
+    Returns:
+        numpy.ndarray: Preprocessed grayscale image array.
+    """
+    image = to_grayscale(image)
+
+    if rules.binarize:
+        image = adaptive_binarize(image, rules.binarize_window, rules.binarize_offset)
+
+    if rules.deskew:
+        angle = estimate_skew(image, rules.max_skew_angle, rules.skew_step)
+        if angle:
+            image = shear_rows(image, angle)
+
+    if rules.crop_margins:
+        image = crop_margins(image, rules.margin)
+
+    if rules.target_x_height:
+        x_height = estimate_x_height(image)
+        if x_height and x_height > rules.target_x_height:
+            image = resize_nearest(image, rules.target_x_height / x_height)
+
+    return image
+
+
+def to_grayscale(image):
+    """
+    Args:
+        image (numpy.ndarray): Grayscale, RGB or RGBA image array.
+
+    Returns:
+        numpy.ndarray: Grayscale image array (luma weights for colour images).
+    """
+    if image.ndim == 2:
+        return image
+    if image.shape[2] == 1:
+        return image[:, :, 0]
+    weights = np.array([0.299, 0.587, 0.114])
+    return (image[:, :, :3] @ weights).astype(np.uint8)
+
+
+def adaptive_binarize(image, window=31, offset=15):
+    """
+    Binarize an image against the mean of each pixel's neighbourhood.
+
+    Local means are read off an integral image, so the cost does not depend on
+    the window size.
+
+    Args:
+        image (numpy.ndarray): Grayscale image array.
+        window (int): Odd neighbourhood size in pixels.
+        offset (int): How much darker than the local mean a pixel must be to be ink.
+
+    Returns:
+        numpy.ndarray: Image array with ink at 0 and background at 255.
+    """
+    half = window // 2
+    window = 2 * half + 1
+    height, width = image.shape
+
+    padded = np.pad(image, half, mode="edge")
+    integral = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1), dtype=np.int64)
+    integral[1:, 1:] = padded.cumsum(axis=0, dtype=np.int64).cumsum(axis=1)
+
+    sums = (
+        integral[window : window + height, window : window + width]
+        - integral[:height, window : window + width]
+        - integral[window : window + height, :width]
+        + integral[:height, :width]
+    )
+    threshold = sums / (window * window) - offset
+
+    return np.where(image < threshold, 0, 255).astype(np.uint8)
+
+
+def estimate_skew(image, max_angle=3.0, step=0.25, max_points=200_000):
+    """
+    Estimate the skew of text lines from the projection profile of the ink.
+
+    For each candidate angle the ink pixels are projected along that slope; the
+    angle giving the sharpest row histogram is the one text lines follow.
+
+    Args:
+        image (numpy.ndarray): Binarized image array (ink at 0).
+        max_angle (float): Largest skew searched, in degrees, either way.
+        step (float): Angle step in degrees.
+        max_points (int): Ink pixels sampled, to bound the cost on dense pages.
+
+    Returns:
+        float: Skew angle in degrees (positive when lines go down to the right).
+    """
+    ys, xs = np.nonzero(image < 128)
+    if len(ys) == 0:
+        return 0.0
+    if len(ys) > max_points:
+        keep = slice(None, None, len(ys) // max_points + 1)
+        ys, xs = ys[keep], xs[keep]
+
+    xs = xs - image.shape[1] / 2
+    angles = np.arange(-max_angle, max_angle + step / 2, step)
+    scores = []
+    for angle in angles:
+        rows = np.round(ys - xs * np.tan(np.radians(angle))).astype(np.int64)
+        histogram = np.bincount(rows - rows.min())
+        scores.append(np.dot(histogram, histogram))
+
+    best = float(angles[int(np.argmax(scores))])
+    return 0.0 if abs(best) < step / 2 else best
+
+
+def shear_rows(image, angle):
+    """
+    Straighten a small skew by shifting each column vertically.
+
+    For angles of a few degrees this is indistinguishable from a rotation and is
+    a single gather over the image.
+
+    Args:
+        image (numpy.ndarray): Grayscale image array.
+        angle (float): Skew angle in degrees, as returned by estimate_skew.
+
+    Returns:
+        numpy.ndarray: Straightened image array, background filled with white.
+    """
+    height, width = image.shape
+    offsets = np.round((np.arange(width) - width / 2) * np.tan(np.radians(angle)))
+    offsets = offsets.astype(np.intp)
+    pad = int(np.abs(offsets).max())
+
+    padded = np.pad(image, ((pad, pad), (0, 0)), constant_values=255)
+    rows = np.arange(height)[:, None] + offsets[None, :] + pad
+    return padded[rows, np.arange(width)[None, :]]
+
+
+def crop_margins(image, margin=10):
+    """
+    Args:
+        image (numpy.ndarray): Binarized or grayscale image array.
+        margin (int): Border kept around the ink, in pixels.
+
+    Returns:
+        numpy.ndarray: Image cropped to its ink, unchanged if it has none.
+    """
+    ink = image < 128
+    rows = np.flatnonzero(ink.any(axis=1))
+    columns = np.flatnonzero(ink.any(axis=0))
+    if len(rows) == 0:
+        return image
+
+    return image[
+        max(rows[0] - margin, 0) : rows[-1] + margin + 1,
+        max(columns[0] - margin, 0) : columns[-1] + margin + 1,
+    ]
+
+
+def estimate_x_height(image):
+    """
+    Estimate the x-height of the text from the horizontal ink profile.
+
+    Each text line is a run of rows containing ink; the rows holding at least
+    half of the line's densest row make up its x-height band.
+
+    Args:
+        image (numpy.ndarray): Binarized image array (ink at 0).
+
+    Returns:
+        float: Median x-height in pixels, or None if no text line is found.
+    """
+    profile = np.count_nonzero(image < 128, axis=1)
+    has_ink = np.concatenate(([False], profile > 0, [False]))
+    edges = np.flatnonzero(np.diff(has_ink.astype(np.int8)))
+    starts, ends = edges[::2], edges[1::2]
+
+    x_heights = [
+        np.count_nonzero(profile[start:end] >= profile[start:end].max() / 2)
+        for start, end in zip(starts, ends)
+        if end - start > 2
+    ]
+    return float(np.median(x_heights)) if x_heights else None
+
+
+def resize_nearest(image, scale):
+    """
+    Args:
+        image (numpy.ndarray): Image array.
+        scale (float): Scale factor.
+
+    Returns:
+        numpy.ndarray: Image resized with nearest-neighbour sampling.
+    """
+    height, width = image.shape[:2]
+    rows = (np.arange(max(int(height * scale), 1)) / scale).astype(np.intp)
+    columns = (np.arange(max(int(width * scale), 1)) / scale).astype(np.intp)
+    return image[rows[:, None], columns[None, :]]
+
+
+def image_fingerprint(image, size=64, tolerance=2):
+    """
+    Compute a perceptual fingerprint (difference hash) of a page image.
+
+    The image is shrunk to size rows by size + 1 columns by block averaging, and
+    each bit records whether a cell is brighter than its right neighbour. Small
+    changes such as re-encoding or a slightly different render flip few bits,
+    while a different page flips many, so similar pages are found by counting
+    differing bits.
+
+    Args:
+        image (numpy.ndarray): Image array of the page, as built by pix_to_image.
+        size (int): Fingerprint side, giving size * size bits.
+        tolerance (float): Gray level difference between neighbouring cells below
+            which the bit is 0, so flat areas do not depend on noise.
+
+    Returns:
+        numpy.ndarray: Packed fingerprint bits, size * size / 8 bytes.
+    """
+    image = to_grayscale(image)
+    if min(image.shape) < size + 1:
+        image = resize_nearest(image, (size + 1) / min(image.shape))
+
+    # Sum the pixels of each cell with reduceat over the cell boundaries
+    height, width = image.shape
+    rows = np.linspace(0, height, size + 1).astype(np.intp)
+    columns = np.linspace(0, width, size + 2).astype(np.intp)
+    sums = np.add.reduceat(np.add.reduceat(image, rows[:-1], axis=0, dtype=np.int64), columns[:-1], axis=1)
+    cells = sums / np.outer(np.diff(rows), np.diff(columns))
+
+    return np.packbits(cells[:, :-1] > cells[:, 1:] + tolerance)
+
+
+def strip_cuts(image, max_rows, ink_level=250):
+    """
+    Split a page image into horizontal strips, cutting where rows have the least
+    ink so text lines are not cut in half.
+
+    Each cut is placed in the second half of its strip, in the middle of the last
+    run of rows with the least ink there, so it keeps clear of the faint edges of
+    the letters around it.
+
+    Args:
+        image (numpy.ndarray): Grayscale image array of the page.
+        max_rows (int): Largest strip height in rows.
+        ink_level (int): Gray level below which a pixel counts as ink.
+
+    Returns:
+        list: Row positions of the cuts, starting with 0 and ending with the image
+            height.
+    """
+    ink = np.count_nonzero(image < ink_level, axis=1)
+    height = len(ink)
+    max_rows = max(int(max_rows), 2)
+
+    cuts = [0]
+    while height - cuts[-1] > max_rows:
+        start, end = cuts[-1] + max_rows // 2, cuts[-1] + max_rows
+        window = ink[start:end]
+        run_end = len(window) - int(np.argmin(window[::-1]))
+        run_start = run_end - 1
+        while run_start > 0 and window[run_start - 1] == window[run_end - 1]:
+            run_start -= 1
+        cuts.append(start + (run_start + run_end) // 2)
+    cuts.append(height)
+    return cuts
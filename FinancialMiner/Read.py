@@ -1,99 +1,1377 @@
 # Standard library imports
-import os
-import io
+import re
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
 
-# Third-party imports
-import pandas as pd
-import numpy as np
-import fitz
-from PIL import Image
-import pytesseract
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+# Local imports
+from . import get_logger, lazy_import
+from .Checkpoint import PageJournal, journal_identity
+from .OcrCache import page_cache_key, page_content_hash
+from .OcrEngines import (
+    OcrEngine,
+    TesseractEngine,
+    run_tesseract,
+    words_to_lines,
+    OCR_CONFIG,
+)
+from .Preprocess import (
+    BlankPageRules,
+    PreprocessRules,
+    blank_page_type,
+    image_fingerprint,
+    preprocess_image,
+    resize_nearest,
+    strip_cuts,
+)
+from .SharedImages import SharedImagePool, attach_image
+from .Tokens import default_normalizer
 
-# Initialize NLTK resources
-stopw = stopwords.words("english")
-lemmatizer = WordNetLemmatizer()
+# Third-party imports, loaded on first use
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+fitz = lazy_import("fitz")
+pytesseract = lazy_import("pytesseract")
 
-def read(filename):
+logger = get_logger()
+
+# Render resolution used for OCR
+OCR_DPI = 200
+
+# Render resolution of the page fingerprints used to find near-duplicate pages
+DEDUP_DPI = 50
+
+# Largest render resolution of the overview of pages OCRed in strips
+STRIP_OVERVIEW_DPI = 100
+
+# Minimum number of alphanumeric characters for a page text layer to be used instead of OCR
+MIN_TEXT_LAYER_CHARS = 50
+
+# Largest share of the page covered by images for its text layer to be used;
+# above it the page is taken for a scan, possibly under a digital header or
+# footer, and OCRed
+MAX_TEXT_LAYER_IMAGE_SHARE = 0.3
+
+# OCR output with fewer alphanumeric characters, or a lower share of them, is
+# suspected to come from a rotated page
+MIN_OCR_CHARS = 20
+MIN_OCR_ALNUM_RATIO = 0.6
+
+# Columns of the table returned by read
+PAGE_COLUMNS = [
+    "FILE",
+    "PAGE_NUMBER",
+    "WORDS",
+    "COUNT_NUMBERS",
+    "SOURCE",
+    "DPI",
+    "RETRIES",
+    "TIMEOUTS",
+    "NUMBERS<5",
+    "WORDS<20",
+    "PAGE>12",
+]
+
+
+@dataclass(frozen=True)
+class AdaptiveDpiRules:
+    # Render resolutions tried in order: pages
+    # start at the first and move to the next
+    # while their OCR output is not trusted
+    dpis: tuple[int, ...] = (150, 200, 300)
+
+    # Pages are OCRed again when the mean word
+    # confidence (0 to 100) is below this
+    min_confidence: float = 75.0
+
+    # or when more than max_low_confidence_share
+    # of the words are below word_confidence
+    word_confidence: float = 60.0
+    max_low_confidence_share: float = 0.15
+
+    # or when more than max_bad_number_share of the
+    # tokens with digits match none of these regexes
+    # (the parser_rules num_rules)
+    num_patterns: tuple[str, ...] = ()
+    max_bad_number_share: float = 0.2
+
+
+@dataclass(frozen=True)
+class OcrBudget:
+    # Seconds a page may spend in OCR before its
+    # tesseract process is killed, None for no limit.
+    # A batch of pages OCRed by one process gets
+    # this times its number of pages as a whole,
+    # so a single slow page is not cut short there
+    page_timeout: float | None = 120.0
+
+    # Seconds the OCR of a whole document may take,
+    # pages left when it runs out are not OCRed
+    document_timeout: float | None = None
+
+    # Pages whose render would have more pixels
+    # are rendered at a lower resolution to fit
+    max_pixels: int | None = 40_000_000
+
+    # Pages whose render would take more bytes
+    # are rendered and OCRed in horizontal strips
+    # that each fit, None to render whole pages
+    max_render_bytes: int | None = 32 * 1024 * 1024
+
+    # Resolution of the single retry of a page
+    # that ran out of time
+    retry_dpi: int = 100
+
+
+@dataclass(frozen=True)
+class OcrSettings:
+    # Render resolution for OCRed pages
+    dpi: int = OCR_DPI
+
+    # OCR backend the pages are sent to
+    engine: OcrEngine = field(default_factory=TesseractEngine)
+
+    # Detect and correct the orientation of
+    # pages suspected to be rotated
+    orientation: bool = True
+
+    # Thresholds to skip OCR on blank and
+    # image-only pages, None to OCR every page
+    blank_rules: BlankPageRules | None = BlankPageRules()
+
+    # Image preprocessing between rendering
+    # and OCR, None to OCR the raw render
+    preprocess: PreprocessRules | None = None
+
+    # Start OCR at a low resolution and re-render
+    # pages with untrusted output, None to OCR
+    # every page once at dpi
+    adaptive_dpi: AdaptiveDpiRules | None = None
+
+    # Time budgets and pixel ceiling,
+    # None to OCR without limits
+    budget: OcrBudget | None = OcrBudget()
+
+    def cache_config(self):
+        """
+        Returns:
+            str: Description of everything besides the page and render resolution
+                that changes the OCR output, used in cache keys.
+        """
+        limits = None if self.budget is None else (self.budget.max_pixels, self.budget.max_render_bytes)
+        return (
+            f"{self.engine.config()}|{self.orientation}|{self.preprocess}|"
+            f"{self.adaptive_dpi}|{limits}"
+        )
+
+
+def read(
+    filename,
+    workers=1,
+    text_layer=True,
+    cache=None,
+    dpi=OCR_DPI,
+    pages=None,
+    batch_size=1,
+    orientation=True,
+    engine=None,
+    skip_blank=True,
+    blank_rules=None,
+    preprocess=None,
+    adaptive_dpi=None,
+    budget=OcrBudget(),
+    shared_memory=False,
+    dedup_threshold=None,
+    checkpoint=None,
+):
     """
     Read PDF file and extract text and metadata.
 
+    This collects every page record from iter_pages into a table.
+
     Args:
         filename (str): Path to the PDF file.
+        workers (int): Number of processes used to OCR pages in parallel. Each
+            worker opens the document itself.
+        text_layer (bool): Use the embedded PDF text layer for pages that have usable
+            text, and only OCR scanned or image-only pages.
+        cache (OcrCache): Optional on-disk OCR cache. Pages whose content, render
+            settings and tesseract version match a cached entry are not rendered.
+        dpi (int): Render resolution for OCRed pages.
+        pages (list): Zero-based page numbers to read. Defaults to every page.
+        batch_size (int): Number of pages OCRed together. With the default engine
+            a batch goes to a single tesseract process, and with 1 every page gets
+            its own tesseract process. Per-page time budgets are not enforced
+            within a batch (see budget).
+        orientation (bool): Detect and correct rotated pages. Orientation detection
+            only runs on suspect pages (rotation metadata, landscape pages or
+            garbled OCR output), and detected rotations are kept in the cache.
+        engine (OcrEngine): OCR backend. Defaults to a TesseractEngine, batched
+            when batch_size is above 1.
+        skip_blank (bool): Skip OCR on blank and image-only pages, detected from
+            ink density and edge statistics of the rendered page. These pages get
+            an empty text_dict entry and SOURCE "blank" or "image".
+        blank_rules (BlankPageRules): Thresholds for the blank page check.
+        preprocess (PreprocessRules): Image preprocessing (binarization, deskew,
+            margin cropping, downscaling) run between rendering and OCR. None
+            sends the raw render to the engine.
+        adaptive_dpi (AdaptiveDpiRules): Start OCR at a low resolution and only
+            render pages again at higher resolutions while their word confidences
+            are low or their numbers do not match the parser number rules. The
+            resolution and retry count of each page are in the DPI and RETRIES
+            columns. Needs an engine with word confidences.
+        budget (OcrBudget): Per-page and per-document OCR time budgets and a pixel
+            ceiling. A page running over its budget has its tesseract process
+            killed and is retried once at a lower resolution, or gets SOURCE
+            "timeout" and no text; the TIMEOUTS column counts the killed attempts.
+            With batch_size above 1, a batch is only killed once it runs over
+            page_timeout times its number of pages, so one slow page can use the
+            time of the others; its pages are then OCRed one by one under their
+            own budgets. Pages left when the document budget has run out are not
+            rendered and get SOURCE "deadline".
+            Pages over the pixel ceiling are rendered at a lower resolution, and
+            pages whose render would take more than max_render_bytes are rendered
+            and OCRed in horizontal strips cut between text lines. None disables
+            the limits.
+        shared_memory (bool): With several workers, render pages in this process
+            and hand the images to the workers through reusable shared memory
+            blocks, instead of having every worker open and render the document.
+            Not used with adaptive_dpi, which renders pages more than once.
+        dedup_threshold (float): Reuse the OCR output of a cached page whose
+            perceptual fingerprint differs from the page in at most this share of
+            bits, instead of OCRing near-duplicate pages again. These pages get
+            SOURCE "dedup". Re-encoded or re-rendered copies of a page differ in
+            0 to 0.02 of their bits and distinct pages in more than 0.05, but a
+            page whose numbers differ in a few digits stays well within any
+            useful threshold, so only use this on corpora where near-duplicate
+            pages are true copies. Needs a cache, None disables it.
+        checkpoint (str): Path to a journal file where finished pages (lines and
+            features) are written as they complete. A run interrupted by a crash
+            or restart resumes from the journal, giving the same df and text_dict
+            as an uninterrupted run. The journal is removed once every page is
+            read.
 
     Returns:
         pandas.DataFrame: DataFrame containing extracted data from PDF.
         dict: Dictionary containing extracted text per page.
     """
+    records = []
+    text_dict = {filename: {}}
 
-    # Initialize dictionaries and table
-    pdf_dict = {"FILE": [], "PAGE_NUMBER": [], "WORDS": [], "COUNT_NUMBERS": []}
-    text_dict = {}
+    for record in iter_pages(
+        filename,
+        workers=workers,
+        text_layer=text_layer,
+        cache=cache,
+        dpi=dpi,
+        pages=pages,
+        batch_size=batch_size,
+        orientation=orientation,
+        engine=engine,
+        skip_blank=skip_blank,
+        blank_rules=blank_rules,
+        preprocess=preprocess,
+        adaptive_dpi=adaptive_dpi,
+        budget=budget,
+        shared_memory=shared_memory,
+        dedup_threshold=dedup_threshold,
+        checkpoint=checkpoint,
+    ):
+        text_dict[filename][record["PAGE_NUMBER"]] = record.pop("LINES")
+        records.append(record)
+
+    # Convert page records to DataFrame
+    df = pd.DataFrame(records, columns=PAGE_COLUMNS)
+
+    return df, text_dict
+
+def iter_pages(
+    filename,
+    workers=1,
+    text_layer=True,
+    cache=None,
+    dpi=OCR_DPI,
+    pages=None,
+    batch_size=1,
+    orientation=True,
+    engine=None,
+    skip_blank=True,
+    blank_rules=None,
+    preprocess=None,
+    adaptive_dpi=None,
+    budget=OcrBudget(),
+    shared_memory=False,
+    dedup_threshold=None,
+    checkpoint=None,
+):
+    """
+    Read a PDF file one page at a time.
+
+    Page records are yielded in page order as soon as they are ready, so callers
+    can start classifying or parsing before the whole document is read and only
+    keep what they need. With several workers, OCR runs ahead of the consumer on
+    a bounded number of pages.
+
+    Args:
+        filename (str): Path to the PDF file.
+        workers (int): Number of processes used to OCR pages in parallel.
+        text_layer (bool): Use the embedded PDF text layer when it is usable.
+        cache (OcrCache): Optional on-disk OCR cache.
+        dpi (int): Render resolution for OCRed pages.
+        pages (list): Zero-based page numbers to read. Defaults to every page.
+        batch_size (int): Number of pages OCRed together.
+        orientation (bool): Detect and correct rotated pages.
+        engine (OcrEngine): OCR backend.
+        skip_blank (bool): Skip OCR on blank and image-only pages.
+        blank_rules (BlankPageRules): Thresholds for the blank page check.
+        preprocess (PreprocessRules): Image preprocessing run before OCR.
+        adaptive_dpi (AdaptiveDpiRules): Confidence-driven render resolutions.
+        budget (OcrBudget): OCR time budgets and pixel ceiling.
+        shared_memory (bool): Render in this process and hand pages to the workers
+            through shared memory.
+        dedup_threshold (float): Largest fingerprint difference for a cached page
+            to count as a near-duplicate.
+        checkpoint (str): Path to a journal file of finished pages, resumed from
+            if it exists and removed once every page is read.
+
+    Yields:
+        dict: Page record with the FILE, PAGE_NUMBER, LINES, WORDS, COUNT_NUMBERS,
+            SOURCE, DPI, RETRIES, TIMEOUTS and dummy variable fields (see page_record).
+    """
+    if engine is None:
+        engine = TesseractEngine(batched=batch_size > 1)
+    if blank_rules is None:
+        blank_rules = BlankPageRules()
+    settings = OcrSettings(
+        dpi=dpi,
+        orientation=orientation,
+        engine=engine,
+        blank_rules=blank_rules if skip_blank else None,
+        preprocess=preprocess,
+        adaptive_dpi=adaptive_dpi,
+        budget=budget,
+    )
+    dedup_config = None
+    if cache is not None and dedup_threshold is not None:
+        dedup_config = f"{dpi}|{settings.cache_config()}|{engine.version()}"
+    deadline = None
+    if budget is not None and budget.document_timeout is not None:
+        deadline = time.time() + budget.document_timeout
+    pool = None
+    if workers > 1 and shared_memory and adaptive_dpi is None:
+        pool = SharedImagePool()
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    shared_images = {}
+    journal = None
+    if checkpoint is not None:
+        journal = PageJournal(
+            checkpoint,
+            journal_identity(
+                filename,
+                f"{text_layer}|{dpi}|{orientation}|{settings.blank_rules}|{settings.cache_config()}",
+            ),
+        )
+        if journal.records:
+            logger.info(f"Resuming {filename} with {len(journal.records)} pages from {checkpoint}")
+    pending = deque()
+    batch = []
+    cache_counts = {"hits": 0, "misses": 0, "dedup": 0}
+    skip_counts = {"blank": 0, "image": 0, "timeout": 0, "deadline": 0}
+
+    def submit_batch():
+        # OCR the waiting pages together, in a worker process when there are workers
+        batch_pages = [entry["page"] for entry in batch]
+        rotations = {entry["page"]: entry["rotation"] for entry in batch}
+        if executor is None:
+            job = ocr_page_range(filename, batch_pages, settings, rotations, deadline)
+        elif pool is not None:
+            shared_pages = [render_shared_page(doc[entry["page"]], entry["rotation"]) for entry in batch]
+            job = executor.submit(ocr_shared_pages, shared_pages, settings, deadline)
+            shared_images[job] = [shared_page["image"] for shared_page in shared_pages]
+        else:
+            job = executor.submit(
+                ocr_page_range, filename, batch_pages, settings, rotations, deadline
+            )
+        for index, entry in enumerate(batch):
+            entry["job"], entry["index"] = job, index
+        batch.clear()
+
+    def render_shared_page(page, rotation):
+        # Render a page into a shared memory block of the pool, at a resolution
+        # that fits the render memory budget (strips are not handed over)
+        page_dpi = capped_dpi(page, dpi, budget)
+        if budget is not None and budget.max_render_bytes is not None:
+            page_dpi = fit_dpi(page, page_dpi, budget.max_render_bytes)
+        pix = render_page(page, page_dpi)
+        return {
+            "image": pool.put(pix_to_image(pix)),
+            "dpi": page_dpi,
+            "rotation": rotation,
+            "suspect": orientation_suspect(page),
+        }
+
+    def ready(entry):
+        if entry["lines"] is not None:
+            return True
+        if entry["job"] is None:
+            return False
+        return not isinstance(entry["job"], Future) or entry["job"].done()
+
+    def finish(entry):
+        if entry["record"] is not None:
+            return entry["record"]
+        if entry["lines"] is None:
+            if entry["job"] is None:
+                submit_batch()
+            job = entry["job"]
+            results = job.result() if isinstance(job, Future) else job
+            for shared_image in shared_images.pop(job, []):
+                pool.release(shared_image)
+            result = results[entry["index"]]
+            entry["lines"], entry["source"] = result["lines"], result["source"]
+            entry["dpi"], entry["retries"] = result["dpi"], result["retries"]
+            entry["timeouts"] = result["timeouts"]
+            if entry["source"] in skip_counts:
+                skip_counts[entry["source"]] += 1
+
+            # Only full OCR output is cached: pages cut short by their time budget
+            # are OCRed again on the next run, and blank page checks depend on
+            # settings the cache key does not cover
+            if cache is not None and entry["source"] == "ocr" and not entry["timeouts"]:
+                cache.put(entry["cache_key"], entry["lines"])
+                if result["rotation"] is not None and entry["rotation"] is None:
+                    cache.put_rotation(entry["content_hash"], result["rotation"])
+                if entry["fingerprint"] is not None:
+                    cache.put_fingerprint(entry["cache_key"], dedup_config, entry["fingerprint"])
+        record = page_record(
+            filename,
+            entry["page"],
+            entry["lines"],
+            entry["source"],
+            entry.get("dpi"),
+            entry.get("retries", 0),
+            entry.get("timeouts", 0),
+        )
+        if journal is not None and entry["source"] != "deadline":
+            journal.add(record)
+        return record
+
+    try:
+        with fitz.open(filename) as doc:
+            page_numbers = list(range(doc.page_count)) if pages is None else sorted(pages)
+
+            for number_page in page_numbers:
+                page = doc[number_page]
+                entry = {
+                    "page": number_page,
+                    "source": "ocr",
+                    "lines": None,
+                    "cache_key": None,
+                    "content_hash": None,
+                    "fingerprint": None,
+                    "rotation": None,
+                    "job": None,
+                    "index": None,
+                    "record": None,
+                }
+
+                # Take pages finished by an interrupted run from the journal
+                if journal is not None and number_page in journal.records:
+                    entry["record"] = dict(journal.records[number_page])
+                    entry["lines"] = entry["record"]["LINES"]
+                    pending.append(entry)
+                    while pending and ready(pending[0]):
+                        yield finish(pending.popleft())
+                    continue
+
+                # Use the embedded text layer when it is usable
+                lines_page = text_layer_lines(page) if text_layer else None
+                if lines_page is not None:
+                    entry["source"] = "text"
+
+                # Otherwise look for the page OCR output in the cache
+                elif cache is not None:
+                    entry["content_hash"] = page_content_hash(page)
+                    entry["cache_key"] = page_cache_key(
+                        entry["content_hash"], dpi, settings.cache_config(), engine.version()
+                    )
+                    lines_page = cache.get(entry["cache_key"])
+                    if lines_page is not None:
+                        entry["source"] = "cache"
+                        cache_counts["hits"] += 1
+                    else:
+                        cache_counts["misses"] += 1
+
+                        # Otherwise look for a near-duplicate page in the cache
+                        if dedup_config is not None:
+                            pix = render_page(page, DEDUP_DPI)
+                            entry["fingerprint"] = image_fingerprint(pix_to_image(pix))
+                            lines_page = cache.find_similar(
+                                entry["fingerprint"], dedup_config, dedup_threshold
+                            )
+                        if lines_page is not None:
+                            entry["source"] = "dedup"
+                            cache_counts["dedup"] += 1
+                            cache.put(entry["cache_key"], lines_page)
+                        elif orientation:
+                            entry["rotation"] = cache.get_rotation(entry["content_hash"])
+
+                # Otherwise queue the page for OCR
+                entry["lines"] = lines_page
+                pending.append(entry)
+                if lines_page is None:
+                    batch.append(entry)
+                    if len(batch) >= batch_size:
+                        submit_batch()
+
+                # Yield finished pages in order, blocking once too many are in flight
+                while pending and (
+                    ready(pending[0]) or len(pending) > max(workers, 1) * batch_size * 2
+                ):
+                    yield finish(pending.popleft())
+
+            # OCR the last, partial batch
+            if batch:
+                submit_batch()
+
+        while pending:
+            yield finish(pending.popleft())
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if pool is not None:
+            pool.close()
+        if journal is not None:
+            journal.close()
+
+    # Keep the journal while pages are left unread, so the next run OCRs them
+    if journal is not None and not skip_counts["deadline"]:
+        journal.remove()
+
+    if cache is not None:
+        logger.info(
+            f"OCR cache for {filename}: {cache_counts['hits']} hits, {cache_counts['misses']} misses"
+        )
+    if cache is not None and dedup_threshold is not None:
+        logger.info(
+            f"Dedup for {filename}: {cache_counts['dedup']} of {cache_counts['misses']} uncached "
+            f"pages reused near-duplicate OCR output "
+            f"({cache_counts['dedup'] / max(cache_counts['misses'], 1):.0%})"
+        )
+    if skip_blank:
+        logger.info(
+            f"Skipped OCR for {filename}: {skip_counts['blank']} blank, {skip_counts['image']} image-only pages"
+        )
+    if skip_counts["timeout"]:
+        logger.warning(
+            f"OCR of {skip_counts['timeout']} pages of {filename} ran out of time"
+        )
+    if skip_counts["deadline"]:
+        logger.warning(
+            f"{skip_counts['deadline']} pages of {filename} were not OCRed, the document budget ran out"
+        )
+
+def page_record(filename, number_page, lines_page, source, dpi=None, retries=0, timeouts=0):
+    """
+    Build the record for a page from its text lines.
+
+    Args:
+        filename (str): Path to the PDF file.
+        number_page (int): Zero-based page number.
+        lines_page (list): Lines of text on the page.
+        source (str): How the lines were obtained ("text", "cache", "dedup", "ocr",
+            "blank" / "image" for pages that skipped OCR, "timeout" for pages
+            whose OCR ran out of time, or "deadline" for pages left when the
+            document budget ran out).
+        dpi (int): Render resolution of the OCR output, None when not rendered.
+        retries (int): Number of times the page was OCRed again at another resolution.
+        timeouts (int): Number of OCR attempts on the page killed by its time budget.
+
+    Returns:
+        dict: Page record with its classification features and dummy variables.
+    """
+    words_lemm, numbers_count = extract_features(lines_page)
+
+    return {
+        "FILE": filename,
+        "PAGE_NUMBER": number_page,
+        "LINES": lines_page,
+        "WORDS": words_lemm,
+        "COUNT_NUMBERS": numbers_count,
+        "SOURCE": source,
+        "DPI": dpi,
+        "RETRIES": retries,
+        "TIMEOUTS": timeouts,
+        # Dummy variables
+        "NUMBERS<5": 1 if numbers_count < 5 else 0,
+        "WORDS<20": 1 if len(words_lemm) < 20 else 0,
+        "PAGE>12": 1 if number_page > 12 else 0,
+    }
+
+def orientation_suspect(page):
+    """
+    Check cheap signals that a page may not be upright: rotation metadata or a
+    landscape page.
+
+    Args:
+        page (fitz.Page): Page to check.
+
+    Returns:
+        bool: True if the orientation of the page should be detected.
+    """
+    return page.rotation != 0 or page.rect.width > page.rect.height
+
+def ocr_output_suspect(lines_page):
+    """
+    Check whether OCR output is near-empty or garbled, as it is for rotated pages.
+
+    Args:
+        lines_page (list): Lines of text from OCR.
+
+    Returns:
+        bool: True if the orientation of the page should be detected.
+    """
+    characters = [c for c in "".join(lines_page) if not c.isspace()]
+    alnum_count = sum(c.isalnum() for c in characters)
+    return alnum_count < MIN_OCR_CHARS or alnum_count < MIN_OCR_ALNUM_RATIO * len(characters)
+
+def correct_orientation(image, lines_page, settings, timeout=None):
+    """
+    Detect the rotation of a page and OCR it again if it is not upright.
+
+    Args:
+        image (numpy.ndarray): Image array of the page.
+        lines_page (list): Lines of text from OCR of the unrotated image.
+        settings (OcrSettings): OCR settings.
+        timeout (float): Seconds allowed for each tesseract call, None for no limit.
+
+    Returns:
+        list: Lines of text of the upright page.
+        int: Clockwise rotation of the page.
+    """
+    rotation = settings.engine.detect_rotation(image, timeout)
+    if rotation:
+        lines_page = settings.engine.recognize(prepare_image(image, rotation, settings), timeout)
+    return lines_page, rotation
+
+def prepare_image(image, rotation, settings):
+    """
+    Turn a rendered page upright and preprocess it for OCR.
+
+    Args:
+        image (numpy.ndarray): Image array of the page.
+        rotation (int): Clockwise rotation of the page, or None.
+        settings (OcrSettings): OCR settings.
+
+    Returns:
+        numpy.ndarray: Image array to send to the OCR engine.
+    """
+    image = rotate_image(image, rotation)
+    if settings.preprocess is not None:
+        image = preprocess_image(image, settings.preprocess)
+    return image
+
+def rotate_image(image, rotation):
+    """
+    Rotate an image array clockwise, without copying.
+
+    Args:
+        image (numpy.ndarray): Image array.
+        rotation (int): Clockwise rotation, a multiple of 90 degrees, or None.
+
+    Returns:
+        numpy.ndarray: Rotated view of the image.
+    """
+    if not rotation:
+        return image
+    return np.rot90(image, k=-(rotation // 90))
+
+def toc_target_pages(filename, patterns, window=1):
+    """
+    Find candidate statement pages from the PDF outline.
+
+    Outline entries whose title matches one of the patterns (for example
+    "statements? of income") are mapped to their page, and a window of pages
+    around each is kept. Entries without a valid destination are looked up by
+    the page label at the end of their title (for example "... F-3").
+
+    Args:
+        filename (str): Path to the PDF file.
+        patterns (list): Regular expressions matched against outline titles,
+            ignoring case.
+        window (int): Number of pages kept before and after each matched page.
+
+    Returns:
+        list: Sorted zero-based page numbers, or None when the outline has no
+            usable entry and the whole document should be read.
+    """
+    target_pages = set()
 
-    # Open PDF file using fitz
     with fitz.open(filename) as doc:
+        for _, title, page_number in doc.get_toc(simple=True):
+            if not any(re.search(pattern, title, re.IGNORECASE) for pattern in patterns):
+                continue
 
-        text_dict[filename] = {}
-        number_pages = 0
+            number_page = page_number - 1
+            if not 0 <= number_page < doc.page_count:
+                label_pages = doc.get_page_numbers(title.split()[-1]) if title.split() else []
+                if not label_pages:
+                    continue
+                number_page = label_pages[0]
 
-        for page in doc:
-            # Add file and page number to the table
-            pdf_dict["FILE"].append(filename)
-            pdf_dict["PAGE_NUMBER"].append(number_pages)
+            target_pages.update(
+                range(max(0, number_page - window), min(doc.page_count, number_page + window + 1))
+            )
 
-            # Extract text from PDF page using pytesseract
-            pix = page.get_pixmap(dpi=200)
-            text = pytesseract.image_to_string(pix_to_image(pix), config=r"--psm 6")
+    return sorted(target_pages) if target_pages else None
 
-            # Split text into lines and add to text_dict
-            lines_page = text.split("\n")
-            text_dict[filename][number_pages] = lines_page
+def text_layer_lines(page):
+    """
+    Rebuild the text lines of a page from its embedded PDF text layer.
 
-            # Translation map for special characters
-            trans_map = str.maketrans({c: None for c in "“-”(’)●–,—.%/:;'\"$§_‘°?«»ﬁ[•]~|`{}!−�"})
+    Words are grouped into visual rows by their vertical position, so a table row
+    such as "Revenue 133,130 133,110" comes out as one line, the same way tesseract
+    reports it, even when the PDF stores each cell as a separate text block.
 
-            # Process lines to extract words and count numbers
-            words_page = [
-                line.strip().lower().translate(trans_map).split(" ")
-                for line in lines_page
-                if not line.isspace()
-            ]
+    The text layer is not used on pages mostly covered by images, such as a
+    scanned statement embedded in a digital filing, whose text is in the image.
+
+    Args:
+        page (fitz.Page): Page to extract text from.
 
-            words2_page = []
-            numbers_count = 0
-
-            for line in words_page:
-                for word in line:
-                    if len(word) > 0:
-                        try:
-                            _ = float(word)
-                            numbers_count += 1
-                        except:
-                            words2_page.append(word)
-
-            # Lemmatize words and remove stopwords
-            words_lemm = [
-                lemmatizer.lemmatize(word)
-                for word in words2_page
-                if word not in stopw
+    Returns:
+        list: Lines of text on the page, or None if the text layer is not usable.
+    """
+    rect = page.rect
+    image_area = sum(abs(fitz.Rect(image["bbox"]) & rect) for image in page.get_image_info())
+    if image_area > MAX_TEXT_LAYER_IMAGE_SHARE * abs(rect):
+        return None
+
+    words = page.get_text("words", sort=True)
+    text = "".join(word[4] for word in words)
+    if sum(c.isalnum() for c in text) < MIN_TEXT_LAYER_CHARS or "\ufffd" in text:
+        return None
+
+    return words_to_lines(word[:5] for word in words)
+
+def ocr_page_range(filename, page_numbers, settings=OcrSettings(), rotations=None, deadline=None):
+    """
+    OCR a range of pages from a PDF file.
+
+    The document is opened here rather than passed in, so this can run inside
+    a worker process (fitz documents cannot be shared between processes).
+
+    Args:
+        filename (str): Path to the PDF file.
+        page_numbers (list): Zero-based page numbers to OCR.
+        settings (OcrSettings): OCR settings.
+        rotations (dict): Known clockwise rotations by page number.
+        deadline (float): time.time() by which the document budget runs out.
+
+    Returns:
+        list: Result for each requested page, in the given order, as a dict with
+            the page "lines", its "source" ("ocr", "timeout", "deadline" when the
+            document budget ran out before the page, or "blank" / "image" when
+            OCR was skipped), its clockwise "rotation" (None when not
+            detected), the "dpi" it was rendered at, the number of "retries" at
+            another resolution and the number of OCR attempts killed on "timeouts".
+    """
+    rotations = {} if rotations is None else dict(rotations)
+    results = {}
+
+    with fitz.open(filename) as doc:
+        # OCR oversized pages in strips
+        for number_page in page_numbers:
+            if oversized_page(doc[number_page], settings):
+                results[number_page] = ocr_page_strips(
+                    doc[number_page], settings, rotations.get(number_page), deadline
+                )
+        other_numbers = [number_page for number_page in page_numbers if number_page not in results]
+
+        # OCR the other pages together when the engine can batch them
+        other_results = None
+        if other_numbers and settings.adaptive_dpi is None and (settings.budget is None or len(other_numbers) > 1):
+            try:
+                other_results = ocr_page_batch(doc, other_numbers, settings, rotations, deadline)
+            except TimeoutError:
+                # Find the slow pages by OCRing them one at a time
+                logger.warning(f"OCR of pages {other_numbers} of {filename} timed out, retrying page by page")
+
+        if other_results is None:
+            other_results = [
+                ocr_page(doc[number_page], settings, rotations.get(number_page), deadline)
+                for number_page in other_numbers
             ]
+        results.update(zip(other_numbers, other_results))
+
+        return [results[number_page] for number_page in page_numbers]
+
+def ocr_page_batch(doc, page_numbers, settings, rotations, deadline=None):
+    """
+    OCR several pages with a single recognize_batch call.
 
-            # Append processed data to pdf_dict
-            pdf_dict["WORDS"].append(words_lemm)
-            pdf_dict["COUNT_NUMBERS"].append(numbers_count)
+    Args:
+        doc (fitz.Document): Open document.
+        page_numbers (list): Zero-based page numbers to OCR.
+        settings (OcrSettings): OCR settings, without adaptive_dpi.
+        rotations (dict): Known clockwise rotations by page number, updated with
+            the detected ones.
+        deadline (float): time.time() by which the document budget runs out.
 
-            number_pages += 1
+    Returns:
+        list: Result for each requested page, as returned by ocr_page_range.
 
-    # Convert pdf_dict to DataFrame
-    df = pd.DataFrame(pdf_dict)
+    Raises:
+        TimeoutError: If the batch runs over its time budget.
+    """
+    results = {
+        number_page: new_result(None, capped_dpi(doc[number_page], settings.dpi, settings.budget))
+        for number_page in page_numbers
+    }
+    ocr_numbers = []
+    timeout = page_timeout(settings.budget, deadline)
 
-    # Add dummy variables to DataFrame
-    df["NUMBERS<5"] = df["COUNT_NUMBERS"].apply(lambda value: 1 if (value < 5) else 0)
-    df["WORDS<20"] = df["WORDS"].apply(lambda value: 1 if len(value) < 20 else 0)
-    df["PAGE>12"] = df["PAGE_NUMBER"].apply(lambda value: 1 if (value > 12) else 0)
+    # Render one page at a time, keeping each pixmap alive until the engine
+    # is done with its image
+    def images():
+        for number_page in page_numbers:
+            page = doc[number_page]
+            pix = render_page(page, results[number_page]["dpi"])
+            image = pix_to_image(pix)
 
-    return df, text_dict
+            # Skip blank and image-only pages
+            if skip_ocr(results[number_page], settings, image=image):
+                continue
+
+            # Detect the orientation before OCR when the page itself looks rotated
+            rotation = rotations.get(number_page)
+            if settings.orientation and rotation is None and orientation_suspect(page):
+                rotation = rotations[number_page] = settings.engine.detect_rotation(image, timeout)
+
+            ocr_numbers.append(number_page)
+            yield prepare_image(image, rotation, settings)
+
+    pages_lines = settings.engine.recognize_batch(images(), timeout)
+    for number_page, lines_page in zip(ocr_numbers, pages_lines):
+        # Otherwise only when the OCR output looks garbled
+        rotation = rotations.get(number_page)
+        if settings.orientation and rotation is None and ocr_output_suspect(lines_page):
+            pix = render_page(doc[number_page], results[number_page]["dpi"])
+            lines_page, rotation = correct_orientation(
+                pix_to_image(pix), lines_page, settings, timeout
+            )
+        results[number_page]["lines"] = lines_page
+        results[number_page]["rotation"] = rotation
+
+    return [results[number_page] for number_page in page_numbers]
+
+def ocr_page(page, settings, rotation=None, deadline=None):
+    """
+    OCR a single page within its time budget.
+
+    With adaptive_dpi set, the page starts at a low resolution and is rendered
+    again at the next one while its OCR output is not trusted (see
+    ocr_output_trusted). Each resolution is lowered where the render would
+    exceed the budget pixel ceiling or render memory. A page that runs out of
+    time before any output is retried once at the budget retry resolution, and gets source "timeout" if
+    that runs out of time too. Nothing is rendered once the document budget has
+    run out.
+
+    Args:
+        page (fitz.Page): Page to OCR.
+        settings (OcrSettings): OCR settings.
+        rotation (int): Known clockwise rotation of the page, if any.
+        deadline (float): time.time() by which the document budget runs out.
+
+    Returns:
+        dict: Page result, as returned by ocr_page_range.
+    """
+    rules = settings.adaptive_dpi
+    budget = settings.budget
+    dpis = []
+    for dpi in rules.dpis if rules is not None else (settings.dpi,):
+        dpi = capped_dpi(page, dpi, budget)
+
+        # Pages are only cut in strips when oversized at settings.dpi, so keep
+        # the higher adaptive resolutions within the render memory budget too
+        if budget is not None and budget.max_render_bytes is not None:
+            dpi = fit_dpi(page, dpi, budget.max_render_bytes)
+        if dpi not in dpis:
+            dpis.append(dpi)
+    suspect = orientation_suspect(page)
+    result = new_result(rotation, dpis[0])
+
+    # Pages left when the document budget has run out are not rendered
+    if skip_ocr(result, settings, deadline):
+        return result
+
+    pix = render_page(page, dpis[0])
+    image = pix_to_image(pix)
+
+    # Skip blank and image-only pages
+    if skip_ocr(result, settings, image=image):
+        return result
+
+    def attempt():
+        # Keep the output of the last resolution that finished in time
+        kept = None
+        page_pix, page_image = pix, image
+        for retries, dpi in enumerate(dpis):
+            if retries:
+                if deadline_passed(deadline):
+                    break
+                page_pix = render_page(page, dpi)
+                page_image = pix_to_image(page_pix)
+            try:
+                lines_page, words = recognize_page(page_image, settings, result, deadline, suspect)
+            except TimeoutError:
+                if kept is None:
+                    raise
+                result["timeouts"] += 1
+                break
+
+            kept = lines_page, dpi
+            result["retries"] = retries
+            if rules is None or ocr_output_trusted(words, rules):
+                break
+        return kept
+
+    def retry(dpi):
+        retry_pix = render_page(page, dpi)
+        lines_page, _ = recognize_page(pix_to_image(retry_pix), settings, result, deadline, suspect)
+        return lines_page, dpi
+
+    return ocr_with_retry(result, settings, deadline, attempt, retry)
+
+def oversized_page(page, settings):
+    """
+    Args:
+        page (fitz.Page): Page to OCR.
+        settings (OcrSettings): OCR settings.
+
+    Returns:
+        bool: True if rendering the whole page would exceed the render memory
+            budget, so it should be OCRed in strips.
+    """
+    budget = settings.budget
+    if budget is None or budget.max_render_bytes is None:
+        return False
+    dpi = capped_dpi(page, settings.dpi, budget)
+    return fit_dpi(page, dpi, budget.max_render_bytes) < dpi
+
+def ocr_page_strips(page, settings, rotation=None, deadline=None):
+    """
+    OCR an oversized page in horizontal strips that each fit the render memory
+    budget, and stitch their lines together.
+
+    A low resolution overview of the page is used for the blank page check,
+    orientation detection and to place the cuts between text lines. Pages that
+    are not upright cannot be cut in horizontal strips of text, so they are OCRed
+    whole at the highest resolution that fits the budget instead.
+
+    Args:
+        page (fitz.Page): Page to OCR.
+        settings (OcrSettings): OCR settings, with a budget.
+        rotation (int): Known clockwise rotation of the page, if any.
+        deadline (float): time.time() by which the document budget runs out.
+
+    Returns:
+        dict: Page result, as returned by ocr_page_range.
+    """
+    budget = settings.budget
+    result = new_result(rotation, capped_dpi(page, settings.dpi, budget))
+
+    # Pages left when the document budget has run out are not rendered
+    if skip_ocr(result, settings, deadline):
+        return result
+
+    overview_dpi = fit_dpi(page, min(STRIP_OVERVIEW_DPI, result["dpi"]), budget.max_render_bytes)
+    overview_pix = render_page(page, overview_dpi)
+    overview = pix_to_image(overview_pix)
+
+    # Skip blank and image-only pages
+    if skip_ocr(result, settings, image=overview):
+        return result
+
+    def ocr_strips(dpi):
+        page_end = page_deadline(budget, deadline)
+
+        # Detect the orientation within the page budget, so running out of time
+        # counts as a timeout of the page
+        if settings.orientation and result["rotation"] is None and orientation_suspect(page):
+            result["rotation"] = settings.engine.detect_rotation(overview, time_left(page_end))
+
+        # OCR rotated pages whole, at a resolution that fits
+        if page.rotation or result["rotation"]:
+            dpi = fit_dpi(page, dpi, budget.max_render_bytes)
+            pix = render_page(page, dpi)
+            image = prepare_image(pix_to_image(pix), result["rotation"], settings)
+            return settings.engine.recognize(image, time_left(page_end)), dpi
+
+        rect = page.rect
+        max_rows = budget.max_render_bytes / (rect.width * dpi / 72) * overview_dpi / dpi
+        cuts = strip_cuts(overview, max_rows)
+        lines_page = []
+        for top, bottom in zip(cuts[:-1], cuts[1:]):
+            # Strips without ink have no text
+            if not (overview[top:bottom] < 128).any():
+                continue
+            clip = fitz.Rect(
+                rect.x0, rect.y0 + top * 72 / overview_dpi, rect.x1, rect.y0 + bottom * 72 / overview_dpi
+            )
+            pix = page.get_pixmap(dpi=dpi, clip=clip, colorspace=fitz.csGRAY, alpha=False)
+            strip_lines = settings.engine.recognize(
+                prepare_image(pix_to_image(pix), None, settings), time_left(page_end)
+            )
+
+            # Keep only the form feed ending the last strip
+            if lines_page and lines_page[-1] == "\f":
+                lines_page.pop()
+            lines_page.extend(strip_lines)
+        return lines_page, dpi
+
+    return ocr_with_retry(
+        result, settings, deadline, lambda: ocr_strips(result["dpi"]), ocr_strips
+    )
+
+def recognize_page(image, settings, result, deadline=None, suspect=False):
+    """
+    OCR a rendered page, detecting its orientation when it is suspect.
+
+    Args:
+        image (numpy.ndarray): Image array of the page.
+        settings (OcrSettings): OCR settings.
+        result (dict): Page result, whose "rotation" is used and updated.
+        deadline (float): time.time() by which the document budget runs out.
+        suspect (bool): Whether the page itself looks rotated (see
+            orientation_suspect).
+
+    Returns:
+        list: Lines of text on the page.
+        list: (word, confidence) tuples with adaptive_dpi set, None otherwise.
+
+    Raises:
+        TimeoutError: If the page runs over its time budget.
+    """
+    deadline = page_deadline(settings.budget, deadline)
+
+    def recognize(rotation):
+        prepared = prepare_image(image, rotation, settings)
+        if settings.adaptive_dpi is not None:
+            return settings.engine.recognize_with_confidence(prepared, time_left(deadline))
+        return settings.engine.recognize(prepared, time_left(deadline)), None
+
+    # Detect the orientation before OCR when the page itself looks rotated
+    if settings.orientation and result["rotation"] is None and suspect:
+        result["rotation"] = settings.engine.detect_rotation(image, time_left(deadline))
+
+    lines_page, words = recognize(result["rotation"])
+
+    # Otherwise only when the OCR output looks garbled
+    if settings.orientation and result["rotation"] is None and ocr_output_suspect(lines_page):
+        result["rotation"] = settings.engine.detect_rotation(image, time_left(deadline))
+        if result["rotation"]:
+            lines_page, words = recognize(result["rotation"])
+
+    return lines_page, words
+
+def ocr_shared_pages(shared_pages, settings=OcrSettings(), deadline=None):
+    """
+    OCR pages rendered by another process and handed over in shared memory.
+
+    Args:
+        shared_pages (list): Pages as dicts with the shared "image" (SharedImage),
+            the "dpi" it was rendered at, the known clockwise "rotation" (or None)
+            and whether the page is orientation "suspect".
+        settings (OcrSettings): OCR settings.
+        deadline (float): time.time() by which the document budget runs out.
+
+    Returns:
+        list: Result for each page, as returned by ocr_page_range.
+    """
+    results = []
+
+    for shared_page in shared_pages:
+        image = attach_image(shared_page["image"])
+        dpi = shared_page["dpi"]
+        result = new_result(shared_page["rotation"], dpi)
+        results.append(result)
+
+        # Skip pages left when the document budget has run out, and blank and
+        # image-only pages
+        if skip_ocr(result, settings, deadline, image):
+            continue
+
+        def attempt():
+            lines_page, _ = recognize_page(image, settings, result, deadline, shared_page["suspect"])
+            return lines_page, dpi
+
+        def retry(retry_dpi):
+            # Scale the shared image down rather than rendering the page again
+            lines_page, _ = recognize_page(
+                resize_nearest(image, retry_dpi / dpi), settings, result, deadline, shared_page["suspect"]
+            )
+            return lines_page, retry_dpi
+
+        ocr_with_retry(result, settings, deadline, attempt, retry)
+
+    return results
+
+def new_result(rotation=None, dpi=None):
+    """
+    Start the result of a page, shared by every OCR path.
+
+    Args:
+        rotation (int): Known clockwise rotation of the page, if any.
+        dpi (int): Resolution the page is first rendered at.
+
+    Returns:
+        dict: Result of a page before OCR, as returned by ocr_page_range.
+    """
+    return {
+        "lines": [],
+        "source": "ocr",
+        "rotation": rotation,
+        "dpi": dpi,
+        "retries": 0,
+        "timeouts": 0,
+    }
+
+def skip_ocr(result, settings, deadline=None, image=None):
+    """
+    Check whether a page should not be OCRed, recording why as the result source:
+    "deadline" when the document budget has run out, or "blank" / "image" for
+    blank and image-only pages.
+
+    Args:
+        result (dict): Page result from new_result, updated when OCR is skipped.
+        settings (OcrSettings): OCR settings.
+        deadline (float): time.time() by which the document budget runs out.
+        image (numpy.ndarray): Rendered page for the blank page check, None to
+            only check the deadline before rendering.
+
+    Returns:
+        bool: True if the page should not be OCRed.
+    """
+    if deadline_passed(deadline):
+        result.update({"source": "deadline", "dpi": None})
+        return True
+
+    if image is not None and settings.blank_rules is not None:
+        page_type = blank_page_type(image, settings.blank_rules)
+        if page_type is not None:
+            result["source"] = page_type
+            return True
+
+    return False
+
+def ocr_with_retry(result, settings, deadline, attempt, retry):
+    """
+    OCR a page within its time budget, retrying it once at the budget retry
+    resolution when it runs out of time before any output. A page whose retry
+    runs out of time too gets source "timeout".
+
+    Args:
+        result (dict): Page result from new_result, whose "dpi" is the resolution
+            of the first attempt. Updated with the outcome.
+        settings (OcrSettings): OCR settings.
+        deadline (float): time.time() by which the document budget runs out.
+        attempt (callable): OCRs the page, returning its lines of text and the
+            resolution they were read at.
+        retry (callable): OCRs the page at the given lower resolution, returning
+            its lines of text and the resolution they were read at.
+
+    Returns:
+        dict: The page result.
+    """
+    try:
+        result["lines"], result["dpi"] = attempt()
+        return result
+    except TimeoutError:
+        result["timeouts"] += 1
+
+    dpi = retry_resolution(result["dpi"], settings.budget, deadline)
+    if dpi is not None:
+        try:
+            result["lines"], result["dpi"] = retry(dpi)
+            result["retries"] = 1
+            return result
+        except TimeoutError:
+            result["timeouts"] += 1
+
+    result.update({"source": "timeout", "dpi": None})
+    return result
+
+def capped_dpi(page, dpi, budget):
+    """
+    Lower the render resolution of a page whose render would exceed the pixel
+    ceiling of the budget.
+
+    Args:
+        page (fitz.Page): Page to render.
+        dpi (int): Requested render resolution.
+        budget (OcrBudget): OCR budget, or None for no ceiling.
+
+    Returns:
+        int: Render resolution within the pixel ceiling.
+    """
+    if budget is None or budget.max_pixels is None:
+        return dpi
+    return fit_dpi(page, dpi, budget.max_pixels)
+
+def fit_dpi(page, dpi, max_pixels):
+    """
+    Args:
+        page (fitz.Page): Page to render.
+        dpi (int): Requested render resolution.
+        max_pixels (int): Largest number of pixels of the render (also its size
+            in bytes for the grayscale renders of render_page).
+
+    Returns:
+        int: The highest resolution up to dpi at which the page fits.
+    """
+    pixels = page.rect.width * page.rect.height * (dpi / 72) ** 2
+    if pixels <= max_pixels:
+        return dpi
+    return max(int(dpi * (max_pixels / pixels) ** 0.5), 1)
+
+def page_timeout(budget, deadline=None):
+    """
+    Args:
+        budget (OcrBudget): OCR budget, or None for no limit.
+        deadline (float): time.time() by which the document budget runs out.
+
+    Returns:
+        float: Seconds allowed for the next page, None for no limit.
+
+    Raises:
+        TimeoutError: If the document budget has run out.
+    """
+    return time_left(page_deadline(budget, deadline))
+
+def page_deadline(budget, deadline=None):
+    """
+    Args:
+        budget (OcrBudget): OCR budget, or None for no limit.
+        deadline (float): time.time() by which the document budget runs out.
+
+    Returns:
+        float: time.time() by which a page started now must be done, None for
+            no limit.
+    """
+    if budget is None or budget.page_timeout is None:
+        return deadline
+    page_end = time.time() + budget.page_timeout
+    return page_end if deadline is None else min(page_end, deadline)
+
+def time_left(deadline):
+    """
+    Args:
+        deadline (float): time.time() deadline, or None for no limit.
+
+    Returns:
+        float: Seconds left until the deadline, None for no limit.
+
+    Raises:
+        TimeoutError: If the deadline has passed.
+    """
+    if deadline is None:
+        return None
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise TimeoutError("OCR time budget exhausted")
+    return remaining
+
+def deadline_passed(deadline):
+    """
+    Args:
+        deadline (float): time.time() deadline, or None for no limit.
+
+    Returns:
+        bool: True if the deadline has passed.
+    """
+    return deadline is not None and time.time() >= deadline
+
+def retry_resolution(dpi, budget, deadline=None):
+    """
+    Args:
+        dpi (int): Resolution of the attempt that ran out of time.
+        budget (OcrBudget): OCR budget, or None for no limit.
+        deadline (float): time.time() by which the document budget runs out.
+
+    Returns:
+        int: Resolution of the single retry of the page, None when it is not
+            retried (no lower retry resolution, or the document budget has run
+            out).
+    """
+    if budget is None or dpi is None or budget.retry_dpi >= dpi or deadline_passed(deadline):
+        return None
+    return budget.retry_dpi
+
+def ocr_output_trusted(words, rules):
+    """
+    Check whether OCR output is good enough to keep, from its word confidences
+    and the shape of its numbers.
+
+    Args:
+        words (list): (word, confidence) tuples from the OCR engine.
+        rules (AdaptiveDpiRules): Confidence thresholds and number patterns.
+
+    Returns:
+        bool: False if the page should be OCRed again at a higher resolution.
+    """
+    if not words:
+        return False
+
+    confidences = np.array([confidence for _, confidence in words])
+    if confidences.mean() < rules.min_confidence:
+        return False
+    if np.mean(confidences < rules.word_confidence) > rules.max_low_confidence_share:
+        return False
+
+    # Numbers read with the wrong characters (e.g. "1O3,4S6") match none of the
+    # parser number patterns. The patterns start with the space before a number,
+    # and must cover the whole token, not just its first digits
+    numbers = [word.strip(".,;:%") for word, _ in words if any(c.isdigit() for c in word)]
+    if numbers and rules.num_patterns:
+        bad_numbers = sum(
+            not any(re.fullmatch(pattern, f" {number}") for pattern in rules.num_patterns)
+            for number in numbers
+        )
+        if bad_numbers / len(numbers) > rules.max_bad_number_share:
+            return False
+
+    return True
+
+def render_page(page, dpi=OCR_DPI):
+    """
+    Render a PDF page for OCR as a grayscale pixmap without alpha.
+
+    Tesseract works on grayscale internally, so this is a third of the memory of
+    an RGB render with no loss for OCR.
+
+    Args:
+        page (fitz.Page): Page to render.
+        dpi (int): Render resolution.
+
+    Returns:
+        fitz.Pixmap: Single channel pixmap of the page.
+    """
+    return page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+
+def extract_features(lines_page):
+    """
+    Extract the bag-of-words features used by the classifier from page lines.
+
+    Args:
+        lines_page (list): Lines of text on a page.
+
+    Returns:
+        list: Lemmatized words on the page, without numbers and stopwords.
+        int: Count of numeric tokens on the page.
+    """
+    return default_normalizer().features(lines_page)
 
 def osd_detection(pix):
     """
@@ -105,22 +1383,28 @@ def osd_detection(pix):
     Returns:
         dict: Dictionary containing orientation and script detection results.
     """
-    image_bytes = pix.tobytes('png')
-    image = Image.open(io.BytesIO(image_bytes))
-    osd_dict = pytesseract.image_to_osd(image, output_type=pytesseract.Output.DICT, config="--psm 0")
+    osd_dict = pytesseract.image_to_osd(
+        pix_to_image(pix), output_type=pytesseract.Output.DICT, config="--psm 0"
+    )
     return osd_dict
 
 def pix_to_image(pix):
     """
-    Convert fitz.Pixmap to PIL Image.
+    Convert fitz.Pixmap to a NumPy image array without copying.
+
+    The array is a view on the pixmap samples, so the pixmap must stay alive while
+    the array is in use.
 
     Args:
         pix (fitz.Pixmap): Pixmap object representing an image.
 
     Returns:
-        numpy.ndarray: NumPy array representing the image.
+        numpy.ndarray: NumPy array representing the image, of shape (height, width)
+            for grayscale pixmaps and (height, width, channels) otherwise.
     """
-    bytes = np.frombuffer(pix.samples, dtype=np.uint8)
+    bytes = np.frombuffer(pix.samples_mv, dtype=np.uint8)
+    if pix.n == 1:
+        return bytes.reshape(pix.height, pix.width)
     img = bytes.reshape(pix.height, pix.width, pix.n)
     return img
 
@@ -130,15 +1414,13 @@ def text_extract_with_osd(pix, rotation=0):
 
     Args:
         pix (fitz.Pixmap): Pixmap object representing an image page.
-        rotation (int): Rotation angle for image correction.
+        rotation (int): Clockwise rotation for image correction, a multiple of 90
+            degrees as reported by osd_detection.
 
     Returns:
         str: Extracted text from the corrected image.
     """
-    image_bytes = pix.tobytes('png')
-    image = Image.open(io.BytesIO(image_bytes))
-
-    corrected_image = image.rotate(-rotation, expand=True)
-    text = pytesseract.image_to_string(corrected_image, config=r"--psm 6")
+    corrected_image = rotate_image(pix_to_image(pix), rotation)
+    text = run_tesseract(corrected_image, OCR_CONFIG)
 
     return text
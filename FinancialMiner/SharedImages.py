@@ -0,0 +1,112 @@
+# Standard library imports
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+
+# Local imports
+from . import lazy_import
+
+# Third-party imports, loaded on first use
+np = lazy_import("numpy")
+
+# Shared memory blocks attached in this process, keyed by name
+_attached_blocks = {}
+
+
+@dataclass(frozen=True)
+class SharedImage:
+    # Name of the shared memory block
+    # holding the image samples
+    name: str
+
+    # Shape of the image array, as
+    # built by pix_to_image
+    shape: tuple[int, ...]
+
+
+class SharedImagePool:
+    """
+    Reusable shared memory blocks for handing rendered pages to worker processes.
+
+    The rendering process copies each page image into a free block and sends only
+    the small SharedImage handle to the worker, which maps the same memory with
+    attach_image. Blocks are released once the worker is done and reused for the
+    next pages, so shared memory is only allocated while the pool warms up.
+
+    Create the pool before the worker processes are started.
+    """
+
+    def __init__(self):
+        self.blocks = {}
+        self.free = []
+
+        # Worker processes forked before the resource tracker starts would run
+        # their own, which unlinks the blocks they attached when they exit
+        resource_tracker.ensure_running()
+
+    def put(self, image):
+        """
+        Copy an image into a free block, allocating a new block when none is
+        large enough.
+
+        Args:
+            image (numpy.ndarray): uint8 image array, as built by pix_to_image.
+
+        Returns:
+            SharedImage: Handle to send to the worker.
+        """
+        for index, block in enumerate(self.free):
+            if block.size >= image.nbytes:
+                del self.free[index]
+                break
+        else:
+            block = shared_memory.SharedMemory(create=True, size=max(image.nbytes, 1))
+            self.blocks[block.name] = block
+
+        np.ndarray(image.shape, dtype=np.uint8, buffer=block.buf)[...] = image
+        return SharedImage(block.name, image.shape)
+
+    def release(self, shared_image):
+        """
+        Return the block of an image the worker is done with to the pool.
+
+        Args:
+            shared_image (SharedImage): Handle returned by put.
+        """
+        self.free.append(self.blocks[shared_image.name])
+
+    def close(self):
+        """
+        Free every block of the pool.
+        """
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+        self.blocks.clear()
+        self.free.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def attach_image(shared_image):
+    """
+    Map an image handed over through a SharedImagePool, without copying.
+
+    Blocks stay attached for the life of the process, so pool blocks reused for
+    later pages are mapped only once.
+
+    Args:
+        shared_image (SharedImage): Handle from SharedImagePool.put.
+
+    Returns:
+        numpy.ndarray: Image array viewing the shared memory block.
+    """
+    block = _attached_blocks.get(shared_image.name)
+    if block is None:
+        block = _attached_blocks[shared_image.name] = shared_memory.SharedMemory(
+            name=shared_image.name
+        )
+    return np.ndarray(shared_image.shape, dtype=np.uint8, buffer=block.buf)
@@ -0,0 +1,113 @@
+# Standard library imports
+import re
+from functools import lru_cache
+
+# Special characters removed from page text before splitting it into words
+SPECIAL_CHARACTERS = "“-”(’)●–,—.%/:;'\"$§_‘°?«»ﬁ[•]~|`{}!−�"
+
+# Translation table deleting the special characters
+TRANSLATION_TABLE = str.maketrans(dict.fromkeys(SPECIAL_CHARACTERS))
+
+# Plain decimal numbers, which float() always accepts
+DECIMAL_PATTERN = re.compile(r"[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)")
+
+# ASCII letter words that float() accepts, ignoring case
+FLOAT_WORDS = frozenset(["inf", "infinity", "nan"])
+
+
+class TokenNormalizer:
+    """
+    Turns the text lines of a page into the bag-of-words features used by the
+    classifier.
+
+    Build it once and reuse it for every page: the translation table is built at
+    import, stopwords are held in a frozenset, numeric tokens are recognised
+    without raising exceptions, and lemmas are memoized in a bounded cache.
+    """
+
+    def __init__(self, stopword_list=None, lemmatizer=None, cache_size=100_000):
+        """
+        Args:
+            stopword_list (iterable): Words left out of the features. Defaults
+                to the NLTK English stopwords.
+            lemmatizer (WordNetLemmatizer): Lemmatizer for the remaining words.
+                Defaults to the NLTK WordNet lemmatizer.
+            cache_size (int): Number of lemmas memoized.
+        """
+        # NLTK and its corpora are only loaded when features are first needed
+        if stopword_list is None:
+            from nltk.corpus import stopwords
+
+            stopword_list = stopwords.words("english")
+        if lemmatizer is None:
+            from nltk.stem import WordNetLemmatizer
+
+            lemmatizer = WordNetLemmatizer()
+
+        self.stopwords = frozenset(stopword_list)
+        self.lemmatize = lru_cache(maxsize=cache_size)(lemmatizer.lemmatize)
+
+    def features(self, lines_page):
+        """
+        Extract the bag-of-words features of a page.
+
+        Args:
+            lines_page (list): Lines of text on a page.
+
+        Returns:
+            list: Lemmatized words on the page, without numbers and stopwords.
+            int: Count of numeric tokens on the page.
+        """
+        words_lemm = []
+        numbers_count = 0
+
+        for line in lines_page:
+            if line.isspace():
+                continue
+            for word in line.strip().lower().translate(TRANSLATION_TABLE).split(" "):
+                if not word:
+                    continue
+                if is_number(word):
+                    numbers_count += 1
+                elif word not in self.stopwords:
+                    words_lemm.append(self.lemmatize(word))
+
+        return words_lemm, numbers_count
+
+
+@lru_cache(maxsize=None)
+def default_normalizer():
+    """
+    The TokenNormalizer with the NLTK defaults, built on first use and shared by
+    every page read in the process.
+
+    Returns:
+        TokenNormalizer: Shared normalizer.
+    """
+    return TokenNormalizer()
+
+
+def is_number(token):
+    """
+    Check whether float() accepts a token, without raising an exception for the
+    common cases.
+
+    Plain decimals and ASCII words are decided directly; anything else (exponents,
+    underscores, non-ASCII digits or whitespace) falls back to float() so the
+    result is always the same.
+
+    Args:
+        token (str): Non-empty token.
+
+    Returns:
+        bool: True if float(token) succeeds.
+    """
+    if DECIMAL_PATTERN.fullmatch(token):
+        return True
+    if token.isascii() and token.isalpha():
+        return token.lower() in FLOAT_WORDS
+    try:
+        float(token)
+        return True
+    except ValueError:
+        return False
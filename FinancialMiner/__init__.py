@@ -1,7 +1,19 @@
+import importlib.util
 import logging
+import multiprocessing
+import os
+import sys
+
+# Log file of the run, in the working directory
+LOG_FILENAME = "mylog.log"
 
 logger = logging.getLogger(__name__)
-fhandler = logging.FileHandler(filename="mylog.log", mode="w")
+# Only the main process starts a new log. The file is opened when the first
+# record is written, in append mode, so records of worker processes are not
+# wiped by the first record of the parent
+if multiprocessing.parent_process() is None and os.path.exists(LOG_FILENAME):
+    open(LOG_FILENAME, "w").close()
+fhandler = logging.FileHandler(filename=LOG_FILENAME, mode="a", delay=True)
 formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 fhandler.setFormatter(formatter)
 logger.addHandler(fhandler)
@@ -10,3 +22,30 @@ logger.setLevel(logging.DEBUG)
 
 def get_logger():
     return logger
+
+
+def lazy_import(name):
+    """
+    Import a module on first attribute access instead of now.
+
+    Heavy dependencies (pandas, numpy, fitz, pytesseract) are imported this way
+    so importing the package stays fast, and only the ones a run actually uses
+    are loaded.
+
+    Args:
+        name (str): Absolute module name.
+
+    Returns:
+        module: The module, loaded on first use.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
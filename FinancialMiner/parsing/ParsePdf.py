@@ -19,7 +19,12 @@ def run(
     df_rfc: DataFrame,
     parser_results: ParserData,
     parser_rules: ParserRules,
+    label_cleaner=None,
 ):
+    # statement specific label cleaning, the income statement rules by default
+    if label_cleaner is None:
+        label_cleaner = clean_income_labels_dirty
+
     # scan and extract text for the pages predicted by the model
     dict_text = get_predictions_text(
         df_model_predictions, parser_results.file_transcription
@@ -47,8 +52,7 @@ def run(
     )
 
     # function to clean labels specific to the statement
-    # to do: add logic to allow user to choose/input type of statement
-    cleaned_label = clean_income_labels_dirty(extract_updated.copy())
+    cleaned_label = label_cleaner(extract_updated.copy())
 
     # function to extract text to be used for extracting dates
     # based on the position of the first metric captured by the process
@@ -77,6 +81,41 @@ def run(
     return df_output
 
 
+def run_statements(
+    statement_predictions: dict[str, ModelOutput],
+    df_rfc: DataFrame,
+    parser_results: ParserData,
+    parser_rules: ParserRules,
+) -> DataFrame:
+    """function to parse several statement types from the same extracted text
+    inputs:
+        statement_predictions: cleaned model predictions of each statement type
+        df_rfc: rfc data, passed on to run
+        parser_results: extracted text shared by every statement
+        parser_rules: parsing rules
+    output:
+        df_output: combined output of every statement, with a STATEMENT column"""
+    outputs = []
+    for statement, df_model_predictions in statement_predictions.items():
+        if df_model_predictions.empty:
+            logger.info(f"No pages predicted for statement: {statement}")
+            continue
+
+        df_output = run(
+            df_model_predictions,
+            df_rfc,
+            parser_results,
+            parser_rules,
+            LABEL_CLEANERS.get(statement, clean_labels_dirty),
+        )
+        df_output.insert(0, "STATEMENT", statement)
+        outputs.append(df_output)
+
+    if not outputs:
+        return pd.DataFrame(columns=["STATEMENT", "FILE", "METRIC", "AMOUNT", "DATE", "MULTIPLIER"])
+    return pd.concat(outputs, ignore_index=True)
+
+
 # extract text from saved data only for pages identified by the model
 def get_predictions_text(df_model_predictions, dict_parser_data):
     predictions = dict(zip(df_model_predictions.FILE, df_model_predictions.PREDICTIONS))
@@ -86,19 +125,13 @@ def get_predictions_text(df_model_predictions, dict_parser_data):
     for key in dict_parser_data.keys():
         if key in predictions.keys():
             dict_text[key] = []
-            page_counter = 0
 
-            for page in range(0, len(list(dict_parser_data[key].keys()))):
+            # pages may not be contiguous when only part of the file was read.
+            # Lines are copied into a new list, so the page text stays intact
+            # for the parsing of other statements
+            for page in sorted(dict_parser_data[key]):
                 if page in predictions[key]:
-                    if page_counter == 0:
-                        text = dict_parser_data[key][page]
-                    else:
-                        text.extend(dict_parser_data[key][page])
-
-                    page_counter += 1
-
-            # append text to the dictionary
-            dict_text[key].extend(text)
+                    dict_text[key].extend(dict_parser_data[key][page])
 
     return dict_text
 
@@ -217,6 +250,34 @@ def clean_income_labels_dirty(extract: ExtractType) -> ExtractType:
     return output_dict
 
 
+def clean_labels_dirty(extract: ExtractType) -> ExtractType:
+    """function to clean labels of statements without statement specific rules
+    (e.g. financial position). A label on a line without numbers is carried
+    over to the next line holding numbers without a label
+    inputs:
+        extract: dictionary containing labels data
+    output:
+        output_dict: dictionary containing updated labels"""
+    output_dict = {}
+    for page in extract:
+        output_dict[page] = {}
+        label = ""
+        for line, line_info in extract[page].items():
+            if not line_info.numbers_list:
+                if line_info.label:
+                    label = line_info.label
+                continue
+
+            if not line_info.label:
+                line_info.label = label
+            label = ""
+
+            if line_info.label:
+                output_dict[page][line] = line_info
+
+    return output_dict
+
+
 def clean_income_labels(extract: ExtractType) -> ExtractType:
     """function to clean "income" labels, only applicable to income statement
     inputs:
@@ -323,6 +384,13 @@ def clean_income_labels(extract: ExtractType) -> ExtractType:
     return output_dict
 
 
+# label cleaning of each statement type, statements not listed use clean_labels_dirty
+LABEL_CLEANERS = {
+    "income": clean_income_labels_dirty,
+    "financial_position": clean_labels_dirty,
+}
+
+
 def combine_labels_dates(
     labels_dict: ExtractType,
     dates_dict: dict[str, list[DateTuple]],
@@ -0,0 +1,48 @@
+"""
+Benchmark batched tesseract invocation against one tesseract process per page.
+
+Every page is OCRed (the text layer is ignored) with both paths and the outputs
+are compared.
+
+Usage:
+    python -m benchmarks.bench_batch_ocr [pdf] [--batch-size N] [--dpi DPI]
+"""
+# Standard library imports
+import argparse
+import time
+
+# Local imports
+from FinancialMiner.Read import read, OCR_DPI
+
+
+def time_read(filename, dpi, batch_size):
+    start = time.perf_counter()
+    _, text_dict = read(filename, text_layer=False, dpi=dpi, batch_size=batch_size)
+    return time.perf_counter() - start, text_dict[filename]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdf", nargs="?", default="pdfs/demo_financials.pdf")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--dpi", type=int, default=OCR_DPI)
+    args = parser.parse_args()
+
+    single_time, single_text = time_read(args.pdf, args.dpi, 1)
+    batched_time, batched_text = time_read(args.pdf, args.dpi, args.batch_size)
+
+    pages = len(single_text)
+    mismatches = [page for page in single_text if single_text[page] != batched_text[page]]
+
+    print(f"pages: {pages}")
+    print(f"one process per page: {single_time:.2f}s ({single_time / max(pages, 1):.3f}s/page)")
+    print(
+        f"batched (batch size {args.batch_size}): {batched_time:.2f}s "
+        f"({batched_time / max(pages, 1):.3f}s/page)"
+    )
+    print(f"speedup: {single_time / batched_time:.2f}x")
+    print(f"pages with different output: {mismatches if mismatches else 'none'}")
+
+
+if __name__ == "__main__":
+    main()
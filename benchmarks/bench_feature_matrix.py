@@ -0,0 +1,100 @@
+"""
+Benchmark building the classifier feature matrix against the previous per-page,
+per-column implementation.
+
+Page words are taken from the text layer of a PDF (demo PDF by default), repeated
+to the requested number of pages, and run through both implementations, checking
+that the TF-IDF features and the model predictions are identical.
+
+Usage:
+    python -m benchmarks.bench_feature_matrix [pdf] [--pages N] [--model DIR] [--name NAME]
+"""
+# Standard library imports
+import argparse
+import pickle
+import time
+
+# Third-party imports
+import fitz
+import pandas as pd
+
+# Local imports
+from FinancialMiner.ClassifyPDF import create_feature_matrix, create_tfidf_vocab
+from FinancialMiner.Read import page_record, text_layer_lines
+
+
+def legacy_feature_matrix(path, vocab_filename, df):
+    # Feature matrix as create_feature_matrix built it before the word index
+    with open(f"{path}{vocab_filename}") as file:
+        vocab_freq = [line.strip() for line in file]
+
+    matrix = pd.DataFrame(columns=vocab_freq)
+    for words in df["WORDS"]:
+        new_row = []
+        for column in matrix.columns:
+            if column not in words:
+                new_row.append(0)
+            else:
+                count_words = {}
+                for word in words:
+                    if word not in count_words:
+                        count_words[word] = 1
+                    else:
+                        count_words[word] += 1
+                new_row.append(count_words[column])
+        matrix.loc[len(matrix)] = new_row
+
+    matrix["NUMBERS<5"] = df["NUMBERS<5"]
+    matrix["WORDS<20"] = df["WORDS<20"]
+    matrix["PAGE>12"] = df["PAGE>12"]
+    matrix.insert(0, "NUMBERS<5", matrix.pop("NUMBERS<5"))
+    matrix.insert(0, "WORDS<20", matrix.pop("WORDS<20"))
+    matrix.insert(0, "PAGE>12", matrix.pop("PAGE>12"))
+
+    return matrix
+
+
+def time_matrix(feature_matrix, path, vocab_filename, df):
+    start = time.perf_counter()
+    matrix = feature_matrix(path, vocab_filename, df)
+    return time.perf_counter() - start, matrix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdf", nargs="?", default="pdfs/demo_financials.pdf")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--model", default="model/income/")
+    parser.add_argument("--name", default="income")
+    args = parser.parse_args()
+
+    with fitz.open(args.pdf) as doc:
+        records = [
+            page_record(args.pdf, number_page, lines, "text")
+            for number_page, lines in enumerate(text_layer_lines(page) for page in doc)
+            if lines is not None
+        ]
+    df = pd.DataFrame((records * (args.pages // len(records) + 1))[: args.pages])
+
+    vocab_filename = f"{args.name}_vocab.txt"
+    legacy_time, legacy_matrix = time_matrix(legacy_feature_matrix, args.model, vocab_filename, df)
+    new_time, new_matrix = time_matrix(create_feature_matrix, args.model, vocab_filename, df)
+
+    legacy_features = create_tfidf_vocab(legacy_matrix)
+    new_features = create_tfidf_vocab(new_matrix)
+    with open(f"{args.model}{args.name}_model_mnb.sav", "rb") as file:
+        model = pickle.load(file)
+
+    print(f"pages: {len(df)}, vocabulary: {new_matrix.shape[1] - 3} words")
+    print(f"legacy:     {legacy_time:.3f}s")
+    print(f"word index: {new_time:.3f}s")
+    print(f"speedup: {legacy_time / new_time:.1f}x")
+    print(f"identical features: {legacy_features.astype(float).equals(new_features.astype(float))}")
+    print(
+        "identical predictions: "
+        f"{(model.predict(legacy_features) == model.predict(new_features)).all()}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark the OCR backends available to read() on the same PDF.
+
+Every page is OCRed (the text layer is ignored) with each engine, and the time
+per page and the share of lines identical to tesseract are reported.
+
+Usage:
+    python -m benchmarks.bench_ocr_engines [pdf] [--batch-size N]
+"""
+# Standard library imports
+import argparse
+import time
+
+# Local imports
+from FinancialMiner.Read import read
+from FinancialMiner.OcrEngines import TesseractEngine, EasyOcrEngine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdf", nargs="?", default="pdfs/demo_financials.pdf")
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    engines = {
+        "tesseract": TesseractEngine(),
+        "tesseract (batched)": TesseractEngine(batched=True),
+        "easyocr": EasyOcrEngine(),
+    }
+
+    reference = None
+    for name, engine in engines.items():
+        start = time.perf_counter()
+        _, text_dict = read(
+            args.pdf, text_layer=False, batch_size=args.batch_size, engine=engine
+        )
+        elapsed = time.perf_counter() - start
+
+        pages_text = text_dict[args.pdf]
+        if reference is None:
+            reference = pages_text
+
+        same_lines = sum(
+            len(set(pages_text[page]) & set(reference[page])) for page in pages_text
+        )
+        total_lines = sum(len(set(reference[page])) for page in reference)
+
+        print(
+            f"{name}: {elapsed:.2f}s ({elapsed / max(len(pages_text), 1):.3f}s/page), "
+            f"{same_lines / max(total_lines, 1):.1%} of tesseract lines reproduced"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark handing rendered pages to worker processes through shared memory
+against pickling the image arrays.
+
+Pages are rendered in this process and sent to a pool of workers, which only
+checksum the image so the handoff dominates. Pages are rendered in RGB by default,
+the worst case for the handoff (a 200 dpi letter page is about 11 MB).
+
+Usage:
+    python -m benchmarks.bench_shared_memory [pdf] [--workers N] [--dpi DPI] [--gray]
+"""
+# Standard library imports
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Third-party imports
+import numpy as np
+import fitz
+
+# Local imports
+from FinancialMiner.Read import pix_to_image, OCR_DPI
+from FinancialMiner.SharedImages import SharedImagePool, attach_image
+
+
+def checksum(image):
+    return int(image[::97, ::89].sum())
+
+
+def checksum_shared(shared_image):
+    return checksum(attach_image(shared_image))
+
+
+def run(filename, dpi, colorspace, workers, shared):
+    pool = SharedImagePool() if shared else None
+    round_trips = []
+    total_bytes = 0
+
+    start = time.perf_counter()
+    with fitz.open(filename) as doc, ProcessPoolExecutor(max_workers=workers) as executor:
+        # Start the workers before timing the handoffs
+        list(executor.map(checksum, [np.zeros((1, 1), dtype=np.uint8)] * workers))
+
+        for page in doc:
+            pix = page.get_pixmap(dpi=dpi, colorspace=colorspace, alpha=False)
+            image = pix_to_image(pix)
+            total_bytes += image.nbytes
+
+            # One page at a time, so the round trip is the handoff cost
+            round_trip_start = time.perf_counter()
+            if shared:
+                shared_image = pool.put(image)
+                executor.submit(checksum_shared, shared_image).result()
+                pool.release(shared_image)
+            else:
+                executor.submit(checksum, image).result()
+            round_trips.append(time.perf_counter() - round_trip_start)
+    elapsed = time.perf_counter() - start
+
+    blocks = len(pool.blocks) if shared else 0
+    if shared:
+        pool.close()
+    return elapsed, round_trips, total_bytes, blocks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdf", nargs="?", default="pdfs/demo_financials.pdf")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--dpi", type=int, default=OCR_DPI)
+    parser.add_argument("--gray", action="store_true", help="render grayscale pages, as read() does")
+    args = parser.parse_args()
+
+    colorspace = fitz.csGRAY if args.gray else fitz.csRGB
+    for name, shared in [("pickle", False), ("shared memory", True)]:
+        elapsed, round_trips, total_bytes, blocks = run(
+            args.pdf, args.dpi, colorspace, args.workers, shared
+        )
+        print(f"{name}:")
+        print(f"  total: {elapsed:.3f}s for {len(round_trips)} pages, {total_bytes / 2**20:.1f} MB of page images")
+        print(
+            f"  handoff round trip: mean {np.mean(round_trips) * 1000:.2f} ms/page, "
+            f"max {np.max(round_trips) * 1000:.2f} ms"
+        )
+        if shared:
+            print(f"  shared memory blocks allocated: {blocks}")
+
+
+if __name__ == "__main__":
+    main()
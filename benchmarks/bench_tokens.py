@@ -0,0 +1,89 @@
+"""
+Benchmark the page word feature extraction against the previous per-page
+implementation.
+
+Text lines are taken from the text layer of a PDF (demo PDF by default) and
+every page is run through both implementations, checking that the features are
+identical and reporting tokens per second.
+
+Usage:
+    python -m benchmarks.bench_tokens [pdf] [--repeat N]
+"""
+# Standard library imports
+import argparse
+import time
+
+# Third-party imports
+import fitz
+from nltk.corpus import stopwords
+from nltk.stem import WordNetLemmatizer
+
+# Local imports
+from FinancialMiner.Read import text_layer_lines
+from FinancialMiner.Tokens import TokenNormalizer
+
+stopw = stopwords.words("english")
+lemmatizer = WordNetLemmatizer()
+
+
+def legacy_features(lines_page):
+    # Features as extract_features built them before TokenNormalizer
+    trans_map = str.maketrans({c: None for c in "“-”(’)●–,—.%/:;'\"$§_‘°?«»ﬁ[•]~|`{}!−�"})
+
+    words_page = [
+        line.strip().lower().translate(trans_map).split(" ")
+        for line in lines_page
+        if not line.isspace()
+    ]
+
+    words2_page = []
+    numbers_count = 0
+
+    for line in words_page:
+        for word in line:
+            if len(word) > 0:
+                try:
+                    _ = float(word)
+                    numbers_count += 1
+                except:
+                    words2_page.append(word)
+
+    words_lemm = [
+        lemmatizer.lemmatize(word)
+        for word in words2_page
+        if word not in stopw
+    ]
+
+    return words_lemm, numbers_count
+
+
+def time_features(features, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [features(lines_page) for lines_page in pages]
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdf", nargs="?", default="pdfs/demo_financials.pdf")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with fitz.open(args.pdf) as doc:
+        pages = [lines for lines in (text_layer_lines(page) for page in doc) if lines is not None]
+    tokens = sum(len(line.split()) for lines_page in pages for line in lines_page) * args.repeat
+
+    normalizer = TokenNormalizer()
+    legacy_time, legacy_results = time_features(legacy_features, pages, args.repeat)
+    new_time, new_results = time_features(normalizer.features, pages, args.repeat)
+
+    print(f"pages: {len(pages)} x {args.repeat}, tokens: {tokens}")
+    print(f"legacy:          {tokens / legacy_time:,.0f} tokens/s")
+    print(f"TokenNormalizer: {tokens / new_time:,.0f} tokens/s")
+    print(f"speedup: {legacy_time / new_time:.2f}x")
+    print(f"identical features: {legacy_results == new_results}")
+
+
+if __name__ == "__main__":
+    main()
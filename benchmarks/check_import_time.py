@@ -0,0 +1,75 @@
+"""
+Check the cold start of FinancialMiner against an import time budget.
+
+Each module is imported in a fresh interpreter with -X importtime. The check
+fails if its cumulative import time is over the budget, or if a heavy dependency
+was actually loaded at import instead of on first use.
+
+Usage:
+    python -m benchmarks.check_import_time [module ...] [--budget MS] [--runs N]
+"""
+# Standard library imports
+import argparse
+import re
+import subprocess
+import sys
+
+# Dependencies that must only be loaded when a run first uses them
+HEAVY_MODULES = ("numpy", "pandas", "fitz", "pymupdf", "pytesseract", "nltk", "PIL", "easyocr")
+
+# "import time: self [us] | cumulative | imported package" lines of -X importtime
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+
+def import_times(module):
+    """
+    Import a module in a fresh interpreter and collect its import times.
+
+    Args:
+        module (str): Module to import.
+
+    Returns:
+        dict: Cumulative import time in microseconds of every module loaded.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            times[match.group(4)] = int(match.group(2))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "modules",
+        nargs="*",
+        default=["FinancialMiner.Read", "FinancialMiner.Pipeline", "FinancialMiner.AsyncRead"],
+    )
+    parser.add_argument("--budget", type=float, default=250.0, help="budget per module, in ms")
+    parser.add_argument("--runs", type=int, default=3, help="imports per module, the fastest counts")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        runs = [import_times(module) for _ in range(args.runs)]
+        elapsed = min(times[module] for times in runs) / 1000
+        heavy = sorted({name.split(".")[0] for name in runs[0]} & set(HEAVY_MODULES))
+
+        over_budget = elapsed > args.budget
+        failed |= over_budget or bool(heavy)
+        print(f"{module}: {elapsed:.1f} ms (budget {args.budget:.0f} ms){' OVER BUDGET' if over_budget else ''}")
+        if heavy:
+            print(f"  heavy modules loaded at import: {', '.join(heavy)}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
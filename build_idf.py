@@ -0,0 +1,58 @@
+"""
+Build the IDF weights used by "page" scoring and streaming classification.
+
+Every page of the given PDFs is read at the classification resolution, and the
+IDF of each feature column of a statement model is computed over all of them and
+written to the statement's "idf_filename", next to its model file. Build it from
+a corpus like the one the model was trained on; weights from a single document
+are a poor estimate.
+
+Usage:
+    python build_idf.py pdf [pdf ...] [--statements income financial_position] [--workers N]
+"""
+# Standard library imports
+import argparse
+
+# Third-party imports
+import pandas as pd
+import yaml
+
+# Local imports
+from FinancialMiner.ClassifyPDF import create_feature_matrix, create_idf_vector
+from FinancialMiner.ModelRegistry import save_idf
+from FinancialMiner.Read import read
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdfs", nargs="+")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--statements", nargs="+", help="defaults to every configured statement")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        config = yaml.safe_load(f)
+    statements = args.statements or list(config["statements"])
+
+    df = pd.concat(
+        [
+            read(filename, args.workers, dpi=config["read_pdf"]["classify_dpi"])[0]
+            for filename in args.pdfs
+        ],
+        ignore_index=True,
+    )
+
+    for statement in statements:
+        model_pipeline_dict = config["statements"][statement]
+        path = model_pipeline_dict["model_objects_filepath"]
+        feature_matrix = create_feature_matrix(
+            path, model_pipeline_dict["vocab_freq_filename"], df
+        )
+        idf_filepath = f"{path}{model_pipeline_dict['idf_filename']}"
+        save_idf(idf_filepath, create_idf_vector(feature_matrix))
+        print(f"{statement}: IDF of {len(df)} pages written to {idf_filepath}")
+
+
+if __name__ == "__main__":
+    main()
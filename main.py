@@ -2,9 +2,8 @@
 import yaml
 
 # Third-party imports
-from FinancialMiner.Read import read
-from FinancialMiner.ClassifyPDF import create_predictions
-from FinancialMiner.parsing.ParsePdf import run, ParserData, ParserRules
+from FinancialMiner.Pipeline import read_and_classify_statements
+from FinancialMiner.parsing.ParsePdf import run_statements, ParserData, ParserRules
 
 # Load configuration from YAML file
 with open("config.yaml", "r") as f:
@@ -18,17 +17,23 @@ replace_blanks = config['parser_rules']['replace_blanks']
 date_pattern_dict = config['parser_rules']['date_pattern']
 thousand_pattern = config['parser_rules']['thousand_pattern']
 dict_label_search = config['parser_rules']['label_search']
+statement_dicts = {
+    statement: config['statements'][statement]
+    for statement in config['extract_statements']
+}
 
 if __name__ == '__main__':
-    # Read and extract text from PDF file
-    df, text_dict = read('pdfs/demo_financials.pdf')
-
-    # Predict and classify PDF content
-    model_df = create_predictions(config['classify_pdf'], df)
+    # Read the PDF file once, classify its pages for every statement from a low
+    # resolution pass and OCR only the predicted pages at full resolution
+    df, text_dict, model_dfs = read_and_classify_statements(
+        'pdfs/demo_financials.pdf',
+        statement_dicts,
+        classify_dpi=config['read_pdf']['classify_dpi'],
+    )
 
-    # Parse PDF content using defined rules and patterns
-    pdf_output = run(
-        model_df,
+    # Parse the pages of every statement using defined rules and patterns
+    pdf_output = run_statements(
+        model_dfs,
         None,
         ParserData(text_dict, None),
         ParserRules(